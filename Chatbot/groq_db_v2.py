@@ -35,6 +35,9 @@ import numpy as np
 import datetime
 import argparse
 import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 
 # ================== ENVIRONMENT & ENGINE SETUP =====================
 load_dotenv()
@@ -42,17 +45,52 @@ load_dotenv()
 hrms_db_url = os.environ.get("DATABASE_URL")
 if not hrms_db_url:
     raise ValueError("DATABASE_URL not set in environment.")
-engine = create_engine(hrms_db_url)
+# One pool for the whole process; in --serve mode it outlives many requests,
+# so connections the database has since closed are replaced on checkout
+engine = create_engine(hrms_db_url, pool_pre_ping=True)
 
 # ================== LOGGING SETUP =====================
 logging.basicConfig(level=logging.INFO, stream=sys.stderr)
 logger = logging.getLogger(__name__)
 
 # ================== GROQ CLIENTS =====================
-client = Groq()
-instructor_client = instructor.from_groq(Groq(), mode=instructor.Mode.JSON)
+# GROQ_BASE_URL points both clients at another endpoint, e.g. the local
+# stand-in (server/resume_parser/groq_standin.py) for load tests
+groq_base_url = os.environ.get("GROQ_BASE_URL") or None
+client = Groq(base_url=groq_base_url)
+instructor_client = instructor.from_groq(Groq(base_url=groq_base_url), mode=instructor.Mode.JSON)
+
+# ================== SIMILARITY INDEX =====================
+# Local candidate/job index (server/resume_parser/similarity_index.py). When it
+# is available, job recommendations hand the LLM the active jobs closest to the
+# resume instead of the first 10 rows of the jobs table.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "server", "resume_parser"))
+try:
+    from similarity_index import SimilarityIndex, DEFAULT_INDEX_DIR, index_lock
+except ImportError as e:
+    logger.warning(f"Similarity index unavailable, recommending the first active jobs: {e}")
+    SimilarityIndex = None
+
+RECOMMENDED_JOBS_LIMIT = 10
 
 # ================== TOOL FUNCTIONS =====================
+def fetch_matching_active_jobs(resume_text: Optional[str]) -> pd.DataFrame:
+    """Active jobs for a candidate, most similar to their resume first. Falls back to the first RECOMMENDED_JOBS_LIMIT active jobs when there is no resume text or no similarity index."""
+    if SimilarityIndex is None or not resume_text or pd.isna(resume_text):
+        return pd.read_sql(f"SELECT * FROM jobs WHERE status = 'active' LIMIT {RECOMMENDED_JOBS_LIMIT}", engine)
+    jobs_df = pd.read_sql("SELECT * FROM jobs WHERE status = 'active'", engine)
+    try:
+        with index_lock(DEFAULT_INDEX_DIR, exclusive=False):
+            matches = SimilarityIndex().similar_to_text("jobs", resume_text, RECOMMENDED_JOBS_LIMIT, among=jobs_df["id"].tolist())
+    except Exception as e:
+        logger.error(f"Similarity index query failed: {e}")
+        matches = []
+    # Jobs not in the index yet (or a failed query) fill the remaining places in table order
+    ranked_ids = [match["id"] for match in matches]
+    order = {job_id: position for position, job_id in enumerate(ranked_ids)}
+    rank = jobs_df["id"].map(order).fillna(len(order) + jobs_df.index.to_series())
+    return jobs_df.assign(_rank=rank).sort_values("_rank", kind="stable").drop(columns=["_rank"]).head(RECOMMENDED_JOBS_LIMIT)
+
 def clean_nan_values(obj):
     """Recursively replace NaN values with None for JSON serialization"""
     if isinstance(obj, dict):
@@ -227,9 +265,8 @@ def match_candidates_to_jobs_from_postgresql(first_name: str, last_name: str) ->
         if 'updated_at' in candidate_df.columns:
             candidate_df = candidate_df.drop(columns=['updated_at'])
         
-        # Directly fetch active jobs
-        jobs_query = "SELECT * FROM jobs WHERE status = 'active' LIMIT 10"
-        jobs_df = pd.read_sql(jobs_query, engine)
+        # Active jobs closest to the candidate's resume
+        jobs_df = fetch_matching_active_jobs(candidate.get("resume_text"))
         
         # Clean up jobs data
         if 'created_at' in jobs_df.columns:
@@ -378,9 +415,8 @@ def get_my_job_recommendations(user_id: int) -> Dict[str, Any]:
         candidate = candidate_df.iloc[0].to_dict()
         candidate = clean_nan_values(candidate)
         
-        # Get active jobs
-        jobs_query = "SELECT * FROM jobs WHERE status = 'active' LIMIT 10"
-        jobs_df = pd.read_sql(jobs_query, engine)
+        # Active jobs closest to the candidate's resume
+        jobs_df = fetch_matching_active_jobs(candidate.get("resume_text"))
         
         # Clean up jobs data
         if 'created_at' in jobs_df.columns:
@@ -659,97 +695,87 @@ def convert_tool_results_to_dict(tool_results):
                 }
             },
             "result": result["result"],
-            "success": result["success"]
+            "success": result["success"],
+            "duration_ms": result.get("duration_ms")
         }
         serializable_results.append(serializable_result)
     
     return serializable_results
 
 # ================== TOOL EXECUTION =====================
-def execute_tools_parallel(tool_calls: List) -> List[Dict[str, Any]]:
-    results = []
-    for tool_call in tool_calls:
-        try:
-            function_name = tool_call.function.name
-            function_args = json.loads(tool_call.function.arguments)
-            # print(f"DEBUG: Function: {function_name}, Args: {function_args}, Type: {type(function_args)}")
-            
-            if function_name in available_functions:
-                function_to_call = available_functions[function_name]
-                # Fix: If function_args is None or empty, call with no args
-                if not function_args:
-                    # print(f"DEBUG: Calling {function_name} with no arguments")
-                    function_response = function_to_call()
-                else:
-                    # print(f"DEBUG: Calling {function_name} with arguments: {function_args}")
-                    function_response = function_to_call(**function_args)
-                results.append({
-                    "tool_call": tool_call,
-                    "result": function_response,
-                    "success": not function_response.get("is_error", False)
-                })
+# Tool calls from one model turn are independent DB lookups, so they run
+# concurrently on a shared thread pool. Each gets TOOL_TIMEOUT_S from the
+# moment it is submitted; a tool that overruns is reported as failed (its
+# thread finishes in the background, it cannot be interrupted). Results keep
+# the order of tool_calls and carry their own duration_ms.
+TOOL_TIMEOUT_S = float(os.environ.get("CHATBOT_TOOL_TIMEOUT_S", "20"))
+TOOL_WORKERS = int(os.environ.get("CHATBOT_TOOL_WORKERS", "16"))
+tool_pool = ThreadPoolExecutor(max_workers=TOOL_WORKERS, thread_name_prefix="chatbot-tool")
+
+def elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 1)
+
+def run_tool_call(tool_call, functions: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one tool call against the functions the user may call and return its tool_results entry."""
+    started = time.perf_counter()
+    try:
+        function_name = tool_call.function.name
+        function_args = json.loads(tool_call.function.arguments)
+        
+        if function_name in functions:
+            function_to_call = functions[function_name]
+            # Fix: If function_args is None or empty, call with no args
+            if not function_args:
+                function_response = function_to_call()
             else:
-                # print(f"DEBUG: Unknown function: {function_name}")
-                results.append({
-                    "tool_call": tool_call,
-                    "result": {"error": f"Unknown function: {function_name}", "is_error": True},
-                    "success": False
-                })
-        except Exception as e:
-            # print(f"DEBUG: Error in execute_tools_parallel: {type(e).__name__}: {str(e)}")
-            # print(f"DEBUG: Tool call: {tool_call}")
-            # print(f"DEBUG: Function name: {tool_call.function.name}")
-            # print(f"DEBUG: Function arguments: {tool_call.function.arguments}")
-            logger.error(f"Error executing tool {tool_call.function.name}: {e}")
-            results.append({
+                function_response = function_to_call(**function_args)
+            return {
                 "tool_call": tool_call,
-                "result": {"error": str(e), "is_error": True},
-                "success": False
-            })
-    return results
+                "result": function_response,
+                "success": not function_response.get("is_error", False),
+                "duration_ms": elapsed_ms(started)
+            }
+        return {
+            "tool_call": tool_call,
+            "result": {"error": f"Unknown function: {function_name}", "is_error": True},
+            "success": False,
+            "duration_ms": elapsed_ms(started)
+        }
+    except Exception as e:
+        logger.error(f"Error executing tool {tool_call.function.name}: {e}")
+        return {
+            "tool_call": tool_call,
+            "result": {"error": str(e), "is_error": True},
+            "success": False,
+            "duration_ms": elapsed_ms(started)
+        }
 
-def execute_tools_parallel_with_context(tool_calls: List, available_functions_for_user: Dict[str, Any]) -> List[Dict[str, Any]]:
+def execute_tool_calls(tool_calls: List, functions: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Run tool calls concurrently, each with TOOL_TIMEOUT_S; results are in tool_calls order."""
+    submitted = time.perf_counter()
+    futures = [tool_pool.submit(run_tool_call, tool_call, functions) for tool_call in tool_calls]
     results = []
-    for tool_call in tool_calls:
+    for tool_call, future in zip(tool_calls, futures):
         try:
-            function_name = tool_call.function.name
-            function_args = json.loads(tool_call.function.arguments)
-            # print(f"DEBUG: Function: {function_name}, Args: {function_args}, Type: {type(function_args)}")
-            
-            if function_name in available_functions_for_user:
-                function_to_call = available_functions_for_user[function_name]
-                # Fix: If function_args is None or empty, call with no args
-                if not function_args:
-                    # print(f"DEBUG: Calling {function_name} with no arguments")
-                    function_response = function_to_call()
-                else:
-                    # print(f"DEBUG: Calling {function_name} with arguments: {function_args}")
-                    function_response = function_to_call(**function_args)
-                results.append({
-                    "tool_call": tool_call,
-                    "result": function_response,
-                    "success": not function_response.get("is_error", False)
-                })
-            else:
-                # print(f"DEBUG: Unknown function: {function_name}")
-                results.append({
-                    "tool_call": tool_call,
-                    "result": {"error": f"Unknown function: {function_name}", "is_error": True},
-                    "success": False
-                })
-        except Exception as e:
-            # print(f"DEBUG: Error in execute_tools_parallel_with_context: {type(e).__name__}: {str(e)}")
-            # print(f"DEBUG: Tool call: {tool_call}")
-            # print(f"DEBUG: Function name: {tool_call.function.name}")
-            # print(f"DEBUG: Function arguments: {tool_call.function.arguments}")
-            logger.error(f"Error executing tool {tool_call.function.name}: {e}")
+            remaining = TOOL_TIMEOUT_S - (time.perf_counter() - submitted)
+            results.append(future.result(timeout=max(0, remaining)))
+        except FutureTimeoutError:
+            logger.error(f"Tool {tool_call.function.name} timed out after {TOOL_TIMEOUT_S}s")
+            future.cancel()  # only helps if it has not started yet
             results.append({
                 "tool_call": tool_call,
-                "result": {"error": str(e), "is_error": True},
-                "success": False
+                "result": {"error": f"{tool_call.function.name} timed out after {TOOL_TIMEOUT_S:g}s", "is_error": True},
+                "success": False,
+                "duration_ms": elapsed_ms(submitted)
             })
     return results
 
+def execute_tools_parallel(tool_calls: List) -> List[Dict[str, Any]]:
+    return execute_tool_calls(tool_calls, available_functions)
+
+def execute_tools_parallel_with_context(tool_calls: List, available_functions_for_user: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return execute_tool_calls(tool_calls, available_functions_for_user)
+
 # ================== SYSTEM PROMPT =====================
 system_prompt = (
     """
@@ -1012,6 +1038,46 @@ def run_hr_conversation(user_prompt: str, user_context: Optional[Dict[str, Any]]
         "conversation_history": conversation_history
     }
 
+# ================== RESIDENT SERVER =====================
+def handle_chat_request(request: Dict[str, Any]) -> Dict[str, Any]:
+    """Answer one --serve request: {"id", "message", "user_id", "user_role", "conversation_history"}. The conversation result goes under "result" (it may itself have status "error"); a top-level "error" means the request could not be handled at all."""
+    try:
+        user_context = {
+            'user_id': int(request['user_id']),
+            'user_role': request['user_role'],
+            'conversation_history': request.get('conversation_history') or []
+        }
+        logger.info(f"Chat request {request.get('id')}: user_id={user_context['user_id']}, role={user_context['user_role']}, history_length={len(user_context['conversation_history'])}")
+        result = run_hr_conversation(request['message'], user_context)
+        logger.info(f"Chat request {request.get('id')} completed. Status: {result.get('status', 'unknown')}")
+        return {"id": request.get("id"), "result": result}
+    except Exception as e:
+        logger.error(f"Error in chat request {request.get('id')}: {str(e)}", exc_info=True)
+        return {"id": request.get("id"), "error": str(e)}
+
+def serve(workers: int) -> None:
+    """Stay resident, reading one JSON request per line from stdin and writing one JSON line per answer as it finishes (answers may come back out of order; match them on "id"). Imports, the DB pool and the Groq clients are shared by every session; each conversation runs on a worker thread, since they mostly wait on the API and the database."""
+    write_lock = threading.Lock()
+
+    def respond(response):
+        with write_lock:
+            sys.stdout.write(json.dumps(response) + "\n")
+            sys.stdout.flush()
+
+    logger.info(f"Chatbot serving with {workers} workers")
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for line in sys.stdin:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                respond({"id": None, "error": f"Invalid request: {e}"})
+                continue
+            future = pool.submit(handle_chat_request, request)
+            future.add_done_callback(lambda f: respond(f.result()))
+
 # ================== EXAMPLE USAGE =====================
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='HRMS Chatbot with authentication')
@@ -1019,11 +1085,16 @@ if __name__ == "__main__":
     parser.add_argument('--user-id', type=int, help='User ID')
     parser.add_argument('--user-role', type=str, choices=['admin', 'candidate'], help='User role')
     parser.add_argument('--history', type=str, help='Conversation history as JSON string')
+    parser.add_argument('--serve', action='store_true', help='Stay resident and answer JSON-lines chat requests from stdin')
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent conversations in --serve mode')
     
     args = parser.parse_args()
     
-    # Check if running in API mode (with arguments) or interactive mode
-    if args.message and args.user_id and args.user_role:
+    # Resident mode (the backend's chatbot worker), API mode (one message from
+    # the command line) or interactive mode
+    if args.serve:
+        serve(max(1, args.workers))
+    elif args.message and args.user_id and args.user_role:
         # API mode - called from backend
         try:
             logger.info(f"Starting API mode with message: {args.message}...")
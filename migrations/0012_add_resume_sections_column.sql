@@ -0,0 +1,3 @@
+-- Add resume_sections column to candidates table
+-- JSON array of {name, heading, start, end} offsets into resume_text
+ALTER TABLE candidates ADD COLUMN resume_sections json;
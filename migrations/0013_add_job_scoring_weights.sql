@@ -0,0 +1,3 @@
+-- Add scoring_weights column to jobs table
+-- AI score weights ({EducationScore, ...}) last used to score or re-weight the job's applications
+ALTER TABLE jobs ADD COLUMN scoring_weights json;
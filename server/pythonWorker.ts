@@ -0,0 +1,142 @@
+import { spawn, type ChildProcessWithoutNullStreams } from 'child_process';
+import path from 'path';
+import readline from 'readline';
+
+type PendingRequest = {
+  resolve: (value: any) => void;
+  reject: (error: Error) => void;
+  timer: NodeJS.Timeout;
+};
+
+// Long-lived Python process speaking newline-delimited JSON over stdin/stdout.
+// Every request gets an "id"; the script echoes it back so concurrent requests
+// can be answered out of order. The process is started lazily and restarted
+// on the next request if it exits.
+export class PythonWorker {
+  private process: ChildProcessWithoutNullStreams | null = null;
+  private pending = new Map<number, PendingRequest>();
+  private nextId = 1;
+
+  constructor(private scriptPath: string, private args: string[] = []) {}
+
+  private get name() {
+    return path.basename(this.scriptPath);
+  }
+
+  private start(): ChildProcessWithoutNullStreams {
+    const command = process.platform === 'win32' ? 'python' : 'python3';
+    const child = spawn(command, [this.scriptPath, ...this.args], {
+      env: { ...process.env, PYTHONIOENCODING: 'utf-8' }
+    });
+
+    readline.createInterface({ input: child.stdout }).on('line', (line) => {
+      let message: any;
+      try {
+        message = JSON.parse(line);
+      } catch (e) {
+        console.error(`[${this.name}] Ignoring non-JSON output:`, line);
+        return;
+      }
+      const request = this.pending.get(message.id);
+      if (!request) {
+        if (message.error) console.error(`[${this.name}]`, message.error);
+        return;
+      }
+      this.pending.delete(message.id);
+      clearTimeout(request.timer);
+      if (message.error) {
+        request.reject(new Error(message.error));
+      } else {
+        request.resolve(message);
+      }
+    });
+
+    child.stderr.on('data', (data: Buffer) => {
+      console.error(`[${this.name}]`, data.toString().trimEnd());
+    });
+
+    const fail = (error: Error) => {
+      if (this.process === child) this.process = null;
+      for (const [id, request] of Array.from(this.pending.entries())) {
+        clearTimeout(request.timer);
+        request.reject(error);
+        this.pending.delete(id);
+      }
+    };
+    child.on('error', fail);
+    child.stdin.on('error', fail);
+    child.on('close', (code) => fail(new Error(`${this.name} exited with code ${code}`)));
+
+    this.process = child;
+    return child;
+  }
+
+  request<T = any>(payload: Record<string, unknown>, timeoutMs: number = 60000): Promise<T> {
+    const child = this.process ?? this.start();
+    const id = this.nextId++;
+    return new Promise<T>((resolve, reject) => {
+      const timer = setTimeout(() => {
+        this.pending.delete(id);
+        reject(new Error(`${this.name} request timed out`));
+      }, timeoutMs);
+      this.pending.set(id, { resolve, reject, timer });
+      child.stdin.write(JSON.stringify({ ...payload, id }) + '\n');
+    });
+  }
+
+  stop() {
+    this.process?.stdin.end();
+    this.process = null;
+  }
+}
+
+// Runs a script once for a batch job: writes input to its stdin as JSON and
+// calls onLine for each JSON line it prints. Resolves once the script has
+// exited and every onLine call has settled.
+export function runJsonLines(
+  scriptPath: string,
+  args: string[],
+  input: unknown,
+  onLine: (message: any) => void | Promise<void>
+): Promise<void> {
+  const name = path.basename(scriptPath);
+  const command = process.platform === 'win32' ? 'python' : 'python3';
+  const child = spawn(command, [scriptPath, ...args], {
+    env: { ...process.env, PYTHONIOENCODING: 'utf-8' }
+  });
+  const handlers: Promise<void>[] = [];
+
+  readline.createInterface({ input: child.stdout }).on('line', (line) => {
+    let message: any;
+    try {
+      message = JSON.parse(line);
+    } catch (e) {
+      console.error(`[${name}] Ignoring non-JSON output:`, line);
+      return;
+    }
+    handlers.push(Promise.resolve().then(() => onLine(message)));
+  });
+  child.stderr.on('data', (data: Buffer) => {
+    console.error(`[${name}]`, data.toString().trimEnd());
+  });
+
+  return new Promise<void>((resolve, reject) => {
+    child.on('error', reject);
+    child.stdin.on('error', reject);
+    child.on('close', (code) => {
+      Promise.all(handlers).then(() => {
+        if (code === 0) {
+          resolve();
+        } else {
+          reject(new Error(`${name} exited with code ${code}`));
+        }
+      }, reject);
+    });
+    child.stdin.end(JSON.stringify(input));
+  });
+}
+
+export const resumeExtractionWorker = new PythonWorker('./server/resume_parser/extract_resume_text.py', ['--serve']);
+export const aiScoringWorker = new PythonWorker('./server/resume_parser/ai_scoring.py', ['--serve']);
+export const chatbotWorker = new PythonWorker('./Chatbot/groq_db_v2.py', ['--serve']);
+export const similarityIndexWorker = new PythonWorker('./server/resume_parser/similarity_index.py', ['serve']);
@@ -3,20 +3,176 @@ import json
 import re
 import argparse
 from datetime import datetime
-from groq import Groq
+from groq import Groq, AsyncGroq, RateLimitError
 import os
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from resume_sections import segment_sections, select_sections
+from rate_limiter import TokenBucket
+from prompt_compaction import compact_for_prompt, estimate_tokens
+from local_scorer import SCORE_NAMES, score_matrix, weighted_scores, shortlist
+from red_flags import detect_red_flags
+from reweight import reweight_applications
+from score_stream import ScoreObjectParser, find_score_object
+from score_cache import ScoreCache, make_score_key, DEFAULT_SCORE_CACHE_DIR, DEFAULT_MAX_ENTRIES, DEFAULT_TTL_S
+from score_inputs import input_fingerprint, changed_inputs, weights_digest
 
-# Get API key from environment variable
-api_key = os.environ.get("GROQ_API_KEY")
-if not api_key:
-    print("Error: GROQ_API_KEY environment variable not found.", file=sys.stderr)
-    sys.exit(1)
+# Usage: python ai_scoring.py [--input input.json]     (one application, JSON on stdin)
+#        python ai_scoring.py --serve [--workers N]
+#        python ai_scoring.py --batch [--input items.json] [--concurrency N] [--incremental]
+#        python ai_scoring.py --cache-stats
+#
+# In --serve mode the process stays alive, reusing one Groq client (and its
+# keep-alive HTTPS connections) for every request. It reads one JSON request
+# per line from stdin, in the same format as the single-application input
+# plus an "id", and writes one line per response as it finishes:
+# {"id": 1, "Scores": {...}, "WeightedScore": 72, "RedFlag": "None", "Reasoning": "...",
+#  "PromptTokens": {"before": 2410, "after": 1630, "budget": 3000}, "ScoredBy": "llm",
+#  "Metrics": {...}}
+# or {"id": 1, "error": "..."}. Responses may come back out of order; match
+# them on "id". A request {"id": 2, "action": "reweight", "weights": {...},
+# "applications": [{"id": ..., "Scores": {...}, "Inputs": {...}}, ...]}
+# re-weights stored sub-scores without calling the LLM (see reweight.py) and
+# answers {"id": 2, "results": [...]}; applications sent with their stored
+# "Inputs" get them back with the new weights, so a later --incremental run
+# doesn't rescore them.
+#
+# --batch takes a JSON array of applications (each optionally with an "id",
+# defaulting to its index) and scores them concurrently under a token-bucket
+# limit on the provider's requests and tokens per minute. Results are written
+# as JSON lines, in the same format as --serve, as each one completes. With
+# --shortlist N only the N best applications per job description by the local
+# scorer (local_scorer.py) are sent to the LLM; the rest keep their local
+# scores. "ScoredBy" says which produced a result ("llm" or "local"); the
+# local scorer is also the fallback when the LLM call fails, or when
+# GROQ_API_KEY is unset in --serve and --batch mode.
+#
+# Every LLM-scored result records the inputs it was computed from as "Inputs"
+# (hashes of the resume, job description, dates, weights and scoring setup;
+# see score_inputs.py). Local results (fallbacks, applications left out of the
+# shortlist) have none, so they always count as changed. With --incremental, applications whose "previous_inputs"
+# match their current ones are not rescored: they get
+# {"id": ..., "Skipped": true, "Inputs": {...}} and take no part in the
+# shortlist. Rescored ones list what differed in "Changed".
+#
+# LLM responses are cached (see score_cache.py); pass --no-cache, or
+# "cache": false in an application, to force a fresh call.
+#
+# --stream reads the response as it is generated with a prompt that asks for
+# the scores first; with --no-reasoning (or "reasoning": false in an
+# application) the model is told to skip the explanation and the stream is
+# closed as soon as the scores object is complete, so Reasoning is empty.
+# Applications may also set "stream" themselves.
+#
+# Every result has a "Metrics" block: prompt_build_ms (section selection,
+# compaction), queue_ms (waiting for a --batch slot and the rate limiter),
+# llm_ms and, when streaming, first_token_ms, prompt_tokens and
+# completion_tokens (from the API's usage, or estimated when it sent none:
+# tokens_estimated), parse_ms, red_flag_ms, cache ("hit", "miss" or "off"),
+# fallback (local scores because the LLM call failed), rate_limit_retries
+# and total_ms. DEBUG dumps of inputs, AI responses and parsed scores go to
+# stderr only with --verbose (or RESUME_SCORING_VERBOSE=1).
 
-try:
-    client = Groq(api_key=api_key)
-except Exception as e:
-    print(f"Error initializing Groq client: {e}", file=sys.stderr)
-    sys.exit(1)
+SCORING_MODEL = "llama3-8b-8192"
+SCORING_TEMPERATURE = 0.2
+SCORING_MAX_TOKENS = 512  # Increased to capture more reasoning
+SCORES_ONLY_MAX_TOKENS = 96  # the scores object alone is ~50 tokens
+# Bump the matching version whenever a prompt builder changes so cached
+# responses are not reused
+PROMPT_VERSION = "2"
+PROMPT_V3_VERSION = "1"
+
+DEFAULT_WEIGHTS = {
+    'EducationScore': 0.50,
+    'SkillsScore': 0.30,
+    'ExperienceYearsScore': 0.10,
+    'ExperienceRelevanceScore': 0.10
+}
+LOCAL_FALLBACK_REASON = "Scored locally (keyword, TF-IDF and experience heuristics) because the AI service was unavailable."
+NOT_SHORTLISTED_REASON = "Scored locally; not in the top {} applications shortlisted for AI review."
+
+# Groq's published limits for the scoring model on our plan; override when
+# the account's limits change
+rate_limit_settings = {
+    "requests_per_minute": int(os.environ.get("GROQ_REQUESTS_PER_MINUTE", "30")),
+    "tokens_per_minute": int(os.environ.get("GROQ_TOKENS_PER_MINUTE", "30000")),
+}
+MAX_RATE_LIMIT_RETRIES = 8
+
+# Upper bound on the scoring prompt (the model's context is 8192 tokens,
+# 512 of them reserved for the answer); longer resumes are compacted
+prompt_settings = {
+    "max_prompt_tokens": int(os.environ.get("RESUME_SCORING_MAX_PROMPT_TOKENS", "3000")),
+}
+
+stream_settings = {
+    "stream": os.environ.get("RESUME_SCORING_STREAM", "0") == "1",
+    "reasoning": os.environ.get("RESUME_SCORING_REASONING", "1") == "1",
+}
+
+log_settings = {"verbose": os.environ.get("RESUME_SCORING_VERBOSE", "0") == "1"}
+
+cache_settings = {"cache_dir": DEFAULT_SCORE_CACHE_DIR, "max_entries": DEFAULT_MAX_ENTRIES, "ttl_s": DEFAULT_TTL_S}
+_cache = threading.local()
+
+def debug(message):
+    if log_settings["verbose"]:
+        print(f"DEBUG: {message}", file=sys.stderr)
+
+def elapsed_ms(start):
+    return round((time.perf_counter() - start) * 1000, 1)
+
+def new_metrics():
+    return {
+        "prompt_build_ms": None,
+        "queue_ms": 0.0,
+        "llm_ms": None,
+        "prompt_tokens": None,
+        "completion_tokens": None,
+        "parse_ms": None,
+        "red_flag_ms": None,
+        "cache": "off",
+        "fallback": False,
+        "rate_limit_retries": 0,
+    }
+
+def record_usage(metrics, usage):
+    if usage is not None:
+        metrics["prompt_tokens"] = usage.prompt_tokens
+        metrics["completion_tokens"] = usage.completion_tokens
+        metrics["tokens_estimated"] = False
+
+def estimate_usage(metrics, prompt, response_text):
+    # Streams closed early (and some stand-ins) report no usage
+    if metrics.get("prompt_tokens") is None:
+        metrics["prompt_tokens"] = estimate_tokens(prompt)
+        metrics["completion_tokens"] = estimate_tokens(response_text or "")
+        metrics["tokens_estimated"] = True
+
+def create_client(use_async=False):
+    # Raises when there is no usable client; main() decides whether that is fatal
+    # Get API key from environment variable
+    api_key = os.environ.get("GROQ_API_KEY")
+    if not api_key:
+        raise RuntimeError("GROQ_API_KEY environment variable not found.")
+    # GROQ_BASE_URL points the client at another endpoint, e.g. the local
+    # stand-in in groq_standin.py for load tests
+    base_url = os.environ.get("GROQ_BASE_URL") or None
+    try:
+        if use_async:
+            # No SDK retries: 429s have to reach our limiter as backpressure
+            return AsyncGroq(api_key=api_key, base_url=base_url, max_retries=0)
+        return Groq(api_key=api_key, base_url=base_url)
+    except Exception as e:
+        raise RuntimeError(f"Error initializing Groq client: {e}") from e
+
+def require_client(client):
+    # Without a client (no API key) every uncached application falls back to
+    # the local scorer
+    if client is None:
+        raise RuntimeError("No Groq client (GROQ_API_KEY not set)")
 
 def parse_date(d):
     return datetime.strptime(d, "%Y-%m-%d")
@@ -83,25 +239,168 @@ resume: {resume_text}
 job_description: {job_description}
 """
 
-def evaluate_resume_with_ats_scoring(resume_text, job_description, client):
+def build_ats_prompt_v3(resume_text, job_description, include_reasoning=True):
+    # Scores first, so a streamed answer can be used before the explanation
+    if include_reasoning:
+        after_scores = "After the JSON, briefly explain your reasoning for each scoring category."
+    else:
+        after_scores = "Return only the JSON. Do not add any explanation."
+    return f"""
+Act like a highly experienced and accurate Application Tracking System (ATS).
+Your task is to evaluate the candidate's resume data against the provided job description.
+
+SCORING CATEGORIES:
+1. EducationScore (out of 10): Match between candidate's education and job requirements.
+2. SkillsScore (out of 10): Overlap between required and listed skills.
+3. ExperienceYearsScore (out of 10): Based on number of years of relevant experience.
+4. ExperienceRelevanceScore (out of 10): How well past job roles align with this role.
+
+Start your answer with the JSON scores in this exact format:
+{{
+  "EducationScore": <int 0–10>,
+  "SkillsScore": <int 0–10>,
+  "ExperienceYearsScore": <int 0–10>,
+  "ExperienceRelevanceScore": <int 0–10>
+}}
+{after_scores}
+
+resume: {resume_text}
+job_description: {job_description}
+"""
+
+def build_prompt(resume_text, job_description, stream=False, reasoning=True):
+    if stream or not reasoning:
+        return build_ats_prompt_v3(resume_text, job_description, reasoning)
+    return build_ats_prompt_v2(resume_text, job_description)
+
+def prompt_version(stream=False, reasoning=True):
+    if stream or not reasoning:
+        return f"3.{PROMPT_V3_VERSION}" + ("" if reasoning else "-scores-only")
+    return PROMPT_VERSION
+
+def max_response_tokens(reasoning=True):
+    return SCORING_MAX_TOKENS if reasoning else SCORES_ONLY_MAX_TOKENS
+
+def completion_args(prompt, stream=False, reasoning=True):
+    return dict(
+        model=SCORING_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=SCORING_TEMPERATURE,
+        max_tokens=max_response_tokens(reasoning),
+        top_p=1,
+        stream=stream
+    )
+
+def chunk_text(chunk):
+    return (chunk.choices[0].delta.content or "") if chunk.choices else ""
+
+def chunk_usage(chunk):
+    # Groq sends the usage in an x_groq block on the last chunk
+    return getattr(getattr(chunk, "x_groq", None), "usage", None) or getattr(chunk, "usage", None)
+
+def read_chunk(parser, chunk, metrics, start):
+    text = chunk_text(chunk)
+    if text and "first_token_ms" not in metrics:
+        metrics["first_token_ms"] = elapsed_ms(start)
+    record_usage(metrics, chunk_usage(chunk))
+    return parser.feed(text)
+
+def stream_response_text(parser, reasoning):
+    # Drops whatever else arrived in the chunk that completed the scores
+    if parser.result is not None and not reasoning:
+        return parser.text[:parser.span[1]]
+    return parser.text
+
+def read_stream(stream, reasoning, metrics, start):
+    # Feeds the streamed text to the scores parser; without reasoning there is
+    # nothing left to wait for once the scores are in, so the stream is closed
+    # and the rest of the generation is never read
+    parser = ScoreObjectParser(SCORE_NAMES)
     try:
-        prompt = build_ats_prompt_v2(resume_text, job_description)
-        response = client.chat.completions.create(
-            model="llama3-8b-8192",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.2,
-            max_tokens=512,  # Increased to capture more reasoning
-            top_p=1,
-            stream=False
-        )
-        return response.choices[0].message.content
+        for chunk in stream:
+            if read_chunk(parser, chunk, metrics, start) is not None and not reasoning:
+                break
+    finally:
+        stream.close()
+    return stream_response_text(parser, reasoning)
+
+def evaluate_resume_with_ats_scoring(resume_text, job_description, client, stream=False, reasoning=True, metrics=None):
+    metrics = {} if metrics is None else metrics
+    try:
+        prompt = build_prompt(resume_text, job_description, stream, reasoning)
+        start = time.perf_counter()
+        response = client.chat.completions.create(**completion_args(prompt, stream, reasoning))
+        if stream:
+            response_text = read_stream(response, reasoning, metrics, start)
+        else:
+            response_text = response.choices[0].message.content
+            record_usage(metrics, getattr(response, "usage", None))
+        metrics["llm_ms"] = elapsed_ms(start)
+        estimate_usage(metrics, prompt, response_text)
+        return response_text
     except Exception as e:
         print(f"Error calling Groq API: {e}", file=sys.stderr)
         raise e
 
+def retry_after_seconds(error, attempt):
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return max(0.5, float(headers.get("retry-after")))
+    except (TypeError, ValueError):
+        return min(60, 2 ** attempt)
+
+async def read_stream_async(stream, reasoning, metrics, start):
+    parser = ScoreObjectParser(SCORE_NAMES)
+    try:
+        async for chunk in stream:
+            if read_chunk(parser, chunk, metrics, start) is not None and not reasoning:
+                break
+    finally:
+        await stream.close()
+    return stream_response_text(parser, reasoning)
+
+async def evaluate_resume_with_ats_scoring_async(resume_text, job_description, client, limiter, stream=False, reasoning=True, metrics=None):
+    # 429s pause the shared limiter and are retried, so a burst only slows
+    # the batch down instead of failing applications
+    metrics = {} if metrics is None else metrics
+    prompt = build_prompt(resume_text, job_description, stream, reasoning)
+    tokens = estimate_tokens(prompt) + max_response_tokens(reasoning)
+    for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+        waited = time.perf_counter()
+        await limiter.acquire(tokens)
+        metrics["queue_ms"] = round(metrics.get("queue_ms", 0.0) + elapsed_ms(waited), 1)
+        start = time.perf_counter()
+        try:
+            response = await client.chat.completions.create(**completion_args(prompt, stream, reasoning))
+            if stream:
+                response_text = await read_stream_async(response, reasoning, metrics, start)
+            else:
+                response_text = response.choices[0].message.content
+                record_usage(metrics, getattr(response, "usage", None))
+            metrics["llm_ms"] = elapsed_ms(start)
+            estimate_usage(metrics, prompt, response_text)
+            return response_text
+        except RateLimitError as e:
+            if attempt == MAX_RATE_LIMIT_RETRIES:
+                print(f"Error calling Groq API: still rate limited after {attempt} retries", file=sys.stderr)
+                raise
+            metrics["rate_limit_retries"] = attempt + 1
+            delay = retry_after_seconds(e, attempt)
+            print(f"Rate limited by Groq API, backing off {delay:.1f}s", file=sys.stderr)
+            limiter.pause(delay)
+        except Exception as e:
+            print(f"Error calling Groq API: {e}", file=sys.stderr)
+            raise
+
 def extract_json_struct(text):
+    # The first complete object with all four scores; prose around it
+    # (before for the v2 prompt, after for v3) is the reasoning
+    scores, span = find_score_object(text, SCORE_NAMES)
+    if scores is not None:
+        reasoning = (text[:span[0]] + text[span[1]:]).strip()
+        return {"scores": scores, "reasoning": reasoning}
     try:
-        # First try to extract JSON from the response
+        # Fall back to any JSON in the response
         json_like = re.search(r'\{.*\}', text, re.DOTALL)
         if json_like:
             scores = json.loads(json_like.group())
@@ -112,47 +411,74 @@ def extract_json_struct(text):
         print(f"Error parsing JSON: {e}", file=sys.stderr)
     return {"error": "Could not parse response", "reasoning": text}
 
-def main():
-    parser = argparse.ArgumentParser(description="AI Scoring and Red Flag Detection")
-    parser.add_argument('--input', type=str, help='Path to input JSON file. If not provided, reads from stdin.')
-    args = parser.parse_args()
-    if args.input:
-        with open(args.input, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-    else:
-        data = json.load(sys.stdin)
-    
-    # Debug: Print input data
-    print(f"DEBUG: Received data keys: {list(data.keys())}", file=sys.stderr)
-    print(f"DEBUG: Weights received: {data.get('weights', 'Not found')}", file=sys.stderr)
+def application_inputs(data):
+    stream = data.get("stream", stream_settings["stream"])
+    reasoning = data.get("reasoning", stream_settings["reasoning"])
+    return input_fingerprint(
+        dict(data, weights=data.get("weights", DEFAULT_WEIGHTS)),
+        [SCORING_MODEL, SCORING_TEMPERATURE, prompt_version(stream, reasoning)]
+    )
+
+def parse_application(data):
+    started = time.perf_counter()
+    debug(f"Received data keys: {list(data.keys())}")
+    debug(f"Weights received: {data.get('weights', 'Not found')}")
     
     # Required fields: resume, job_description, experience_dates, education_dates
+    # Optional resume_sections (stored at extraction) limit the prompt to the
+    # summary/experience/education/skills/projects sections of the resume,
+    # which is then compacted to fit the prompt token budget
     resume = data["resume"]
-    job_description = data["job_description"]
-    experience_dates = data.get("experience_dates", [])
-    education_dates = data.get("education_dates", [])
-    weights = data.get("weights", {
-        'EducationScore': 0.50,
-        'SkillsScore': 0.30,
-        'ExperienceYearsScore': 0.10,
-        'ExperienceRelevanceScore': 0.10
-    })
-    
-    print(f"DEBUG: Using weights: {weights}", file=sys.stderr)
-    
-    try:
-        response_text = evaluate_resume_with_ats_scoring(resume, job_description, client)
-        print(f"DEBUG: AI Response: {response_text}", file=sys.stderr)
-    except Exception as e:
-        print(f"DEBUG: Error calling AI: {e}", file=sys.stderr)
-        # Fallback to mock scores for testing
-        print(f"DEBUG: Using fallback scores", file=sys.stderr)
-        response_text = '{"EducationScore": 7, "SkillsScore": 8, "ExperienceYearsScore": 6, "ExperienceRelevanceScore": 7}'
-    
+    resume_sections = data.get("resume_sections") or segment_sections(resume)
+    stream = data.get("stream", stream_settings["stream"])
+    reasoning = data.get("reasoning", stream_settings["reasoning"])
+    overhead_tokens = estimate_tokens(build_prompt("", "", stream, reasoning))
+    resume, job_description, prompt_tokens = compact_for_prompt(
+        select_sections(resume, resume_sections),
+        data["job_description"],
+        data.get("max_prompt_tokens") or prompt_settings["max_prompt_tokens"],
+        overhead_tokens,
+    )
+    # Report the saving against the prompt the full resume would have made
+    prompt_tokens["before"] = overhead_tokens + estimate_tokens(data["resume"]) + estimate_tokens(data["job_description"])
+    debug(f"Prompt tokens: {prompt_tokens['before']} -> {prompt_tokens['after']}")
+    metrics = new_metrics()
+    metrics["prompt_build_ms"] = elapsed_ms(started)
+    application = {
+        "resume": resume,
+        "job_description": job_description,
+        "prompt_tokens": prompt_tokens,
+        "cache": data.get("cache", True),
+        "stream": stream,
+        "reasoning": reasoning,
+        "experience_dates": data.get("experience_dates", []),
+        "education_dates": data.get("education_dates", []),
+        "weights": data.get("weights", DEFAULT_WEIGHTS),
+        "inputs": application_inputs(data),
+        "metrics": metrics,
+        "started": started,
+    }
+    debug(f"Using weights: {application['weights']}")
+    return application
+
+def local_response(scores, reason):
+    # Formats local sub-scores like a model answer so build_result handles both
+    return f"{reason}\n{json.dumps(scores)}"
+
+def build_result(response_text, application, scored_by="llm"):
+    metrics = application["metrics"]
+    start = time.perf_counter()
     scores_and_reasoning = extract_json_struct(response_text)
-    print(f"DEBUG: Parsed scores: {scores_and_reasoning}", file=sys.stderr)
+    metrics["parse_ms"] = elapsed_ms(start)
+    debug(f"Parsed scores: {scores_and_reasoning}")
     
-    red_flag = detect_red_flag(experience_dates, education_dates)
+    # Batches precompute red flags for every application in one pass
+    red_flag = application.get("red_flag")
+    if red_flag is None:
+        start = time.perf_counter()
+        red_flag = detect_red_flag(application["experience_dates"], application["education_dates"])
+        metrics["red_flag_ms"] = elapsed_ms(start)
+    weights = application["weights"]
     
     # Calculate weighted score
     try:
@@ -163,17 +489,258 @@ def main():
             scores_and_reasoning['scores']['ExperienceRelevanceScore'] * weights['ExperienceRelevanceScore']
         )
         weighted_score = round(weighted_score * 10)  # Convert to integer percentage
-        print(f"DEBUG: Calculated weighted score: {weighted_score}", file=sys.stderr)
+        debug(f"Calculated weighted score: {weighted_score}")
     except Exception as e:
-        print(f"DEBUG: Error calculating weighted score: {e}", file=sys.stderr)
+        debug(f"Error calculating weighted score: {e}")
         weighted_score = None
     
     result = {
         "Scores": scores_and_reasoning['scores'],
         "WeightedScore": weighted_score,
         "RedFlag": red_flag,
-        "Reasoning": scores_and_reasoning['reasoning']
+        "Reasoning": scores_and_reasoning['reasoning'],
+        "PromptTokens": application["prompt_tokens"],
+        "ScoredBy": scored_by,
+        "Metrics": {**metrics, "total_ms": elapsed_ms(application["started"])}
     }
+    # Local scores stand in for an LLM score; without a fingerprint the next
+    # incremental run retries them
+    if scored_by == "llm":
+        result["Inputs"] = application["inputs"]
+    if "changed" in application:
+        result["Changed"] = application["changed"]
+    return result
+
+def get_cache():
+    # SQLite connections can't be shared between the --serve threads
+    if not hasattr(_cache, "instance"):
+        _cache.instance = ScoreCache(**cache_settings)
+    return _cache.instance
+
+def lookup_response(application, use_cache):
+    # Returns (cache, key, cached response or None); cache is None when bypassed
+    if not use_cache:
+        return None, None, None
+    cache = get_cache()
+    key = make_score_key(
+        application["resume"], application["job_description"], SCORING_MODEL, SCORING_TEMPERATURE,
+        prompt_version(application["stream"], application["reasoning"])
+    )
+    response_text = cache.get(key)
+    application["metrics"]["cache"] = "miss" if response_text is None else "hit"
+    if response_text is not None:
+        debug("Using cached AI response")
+    return cache, key, response_text
+
+def remember_response(cache, key, response_text):
+    # Only responses we could parse scores from are worth replaying
+    if cache is not None and "scores" in extract_json_struct(response_text):
+        cache.put(key, response_text)
+
+def score_application(data, client, use_cache=True):
+    application = parse_application(data)
+    cache, key, response_text = lookup_response(application, use_cache and application["cache"])
+    if response_text is not None:
+        return build_result(response_text, application)
+    try:
+        require_client(client)
+        response_text = evaluate_resume_with_ats_scoring(
+            application["resume"], application["job_description"], client, application["stream"], application["reasoning"],
+            application["metrics"]
+        )
+        debug(f"AI Response: {response_text}")
+        remember_response(cache, key, response_text)
+    except Exception as e:
+        debug(f"Error calling AI: {e}")
+        debug("Using local scores")
+        application["metrics"]["fallback"] = True
+        scores = dict(zip(SCORE_NAMES, map(int, score_matrix([application])[0])))
+        return build_result(local_response(scores, LOCAL_FALLBACK_REASON), application, "local")
+    return build_result(response_text, application)
+
+async def score_application_async(application, client, limiter, use_cache, fallback_scores):
+    cache, key, response_text = lookup_response(application, use_cache and application["cache"])
+    if response_text is not None:
+        return build_result(response_text, application)
+    try:
+        require_client(client)
+        response_text = await evaluate_resume_with_ats_scoring_async(
+            application["resume"], application["job_description"], client, limiter,
+            application["stream"], application["reasoning"], application["metrics"]
+        )
+        debug(f"AI Response: {response_text}")
+        remember_response(cache, key, response_text)
+    except Exception as e:
+        debug(f"Error calling AI: {e}")
+        debug("Using local scores")
+        application["metrics"]["fallback"] = True
+        return build_result(local_response(fallback_scores, LOCAL_FALLBACK_REASON), application, "local")
+    return build_result(response_text, application)
+
+async def score_batch(items, client, limiter, concurrency, out, use_cache=True, shortlist_size=0, incremental=False):
+    # Writes one JSON line per item as soon as it is scored
+    def emit(index, response):
+        out.write(json.dumps({"id": items[index].get("id", index), **response}, ensure_ascii=False) + "\n")
+        out.flush()
+
+    applications = {}
+    for index, item in enumerate(items):
+        try:
+            if incremental:
+                inputs = application_inputs(item)
+                changed = changed_inputs(inputs, item.get("previous_inputs"))
+                if not changed:
+                    emit(index, {"Skipped": True, "Inputs": inputs})
+                    continue
+            applications[index] = parse_application(item)
+            if incremental:
+                applications[index]["changed"] = changed
+        except Exception as e:
+            emit(index, {"error": str(e)})
+
+    # Local scores and red flags for the whole batch in one pass: the
+    # shortlist ranking and the per-application fallback
+    indices = list(applications)
+    start = time.perf_counter()
+    try:
+        red_flags = detect_red_flags([applications[i] for i in indices])
+    except Exception as e:
+        debug(f"Batch red flags failed, checking one by one: {e}")
+        red_flags = [None] * len(indices)
+    # Each application is charged its share of the batch pass
+    red_flag_ms = round(elapsed_ms(start) / max(1, len(indices)), 3)
+    for i, red_flag in zip(indices, red_flags):
+        applications[i]["red_flag"] = red_flag
+        if red_flag is not None:
+            applications[i]["metrics"]["red_flag_ms"] = red_flag_ms
+    matrix = score_matrix([applications[i] for i in indices])
+    local = {i: dict(zip(SCORE_NAMES, map(int, row))) for i, row in zip(indices, matrix)}
+    selected = set(indices)
+    if shortlist_size:
+        totals = weighted_scores(matrix, [applications[i]["weights"] for i in indices])
+        rows = shortlist([applications[i]["job_description"] for i in indices], totals, shortlist_size)
+        selected = {indices[row] for row in rows}
+    for i in indices:
+        if i not in selected:
+            response_text = local_response(local[i], NOT_SHORTLISTED_REASON.format(shortlist_size))
+            try:
+                response = build_result(response_text, applications[i], "local")
+            except Exception as e:
+                response = {"error": str(e)}
+            emit(i, response)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def score(index):
+        waited = time.perf_counter()
+        async with semaphore:
+            applications[index]["metrics"]["queue_ms"] += elapsed_ms(waited)
+            try:
+                response = await score_application_async(applications[index], client, limiter, use_cache, local[index])
+            except Exception as e:
+                response = {"error": str(e)}
+        return index, response
+
+    for next_result in asyncio.as_completed([score(i) for i in indices if i in selected]):
+        emit(*await next_result)
+
+def reweight_request(request):
+    applications = request.get("applications") or []
+    weights = request.get("weights") or {}
+    results = reweight_applications(applications, weights)
+    for application, result in zip(applications, results):
+        if isinstance(application.get("Inputs"), dict) and result["WeightedScore"] is not None:
+            result["Inputs"] = dict(application["Inputs"], weights=weights_digest(weights))
+    return {"results": results}
+
+def handle_request(request, client, use_cache=True):
+    try:
+        if request.get("action") == "reweight":
+            response = reweight_request(request)
+        else:
+            response = score_application(request, client, use_cache)
+    except Exception as e:
+        response = {"error": str(e)}
+    return {"id": request.get("id"), **response}
+
+def serve(client, workers, use_cache=True):
+    # Scoring is dominated by waiting on the API, so threads sharing the one
+    # client are enough to overlap requests.
+    write_lock = threading.Lock()
+
+    def respond(response):
+        with write_lock:
+            sys.stdout.write(json.dumps(response, ensure_ascii=False) + "\n")
+            sys.stdout.flush()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for line in sys.stdin:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                respond({"id": None, "error": f"Invalid request: {e}"})
+                continue
+            future = pool.submit(handle_request, request, client, use_cache)
+            future.add_done_callback(lambda f: respond(f.result()))
+
+def main():
+    parser = argparse.ArgumentParser(description="AI Scoring and Red Flag Detection")
+    parser.add_argument('--input', type=str, help='Path to input JSON file. If not provided, reads from stdin.')
+    parser.add_argument('--serve', action='store_true', help='Stay resident and score JSON-lines requests from stdin')
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent scoring requests in --serve mode')
+    parser.add_argument('--batch', action='store_true', help='Score a JSON array of applications, streaming JSON lines')
+    parser.add_argument('--concurrency', type=int, default=8, help='Requests in flight at once in --batch mode')
+    parser.add_argument('--shortlist', type=int, default=0, help='In --batch mode, only send the top N per job (by local score) to the LLM')
+    parser.add_argument('--incremental', action='store_true', help='In --batch mode, skip applications whose inputs match their "previous_inputs"')
+    parser.add_argument('--requests-per-minute', type=int, default=rate_limit_settings["requests_per_minute"], help='Provider request limit for --batch')
+    parser.add_argument('--tokens-per-minute', type=int, default=rate_limit_settings["tokens_per_minute"], help='Provider token limit for --batch')
+    parser.add_argument('--max-prompt-tokens', type=int, default=prompt_settings["max_prompt_tokens"], help='Compact resume/job description to keep the prompt under this')
+    parser.add_argument('--stream', action='store_true', default=stream_settings["stream"], help='Stream responses and parse the scores as they arrive')
+    parser.add_argument('--no-reasoning', action='store_true', help='Ask for the scores only and stop reading once they are parsed')
+    parser.add_argument('--verbose', action='store_true', default=log_settings["verbose"], help='Print DEBUG details (inputs, AI responses, parsed scores) to stderr')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the score cache')
+    parser.add_argument('--cache-dir', type=str, default=DEFAULT_SCORE_CACHE_DIR, help='Directory for the score cache')
+    parser.add_argument('--cache-max-entries', type=int, default=DEFAULT_MAX_ENTRIES, help='Cached responses kept before LRU eviction')
+    parser.add_argument('--cache-ttl-hours', type=float, default=DEFAULT_TTL_S / 3600, help='Age after which cached responses are ignored')
+    parser.add_argument('--cache-stats', action='store_true', help='Print score cache hit/miss statistics as JSON and exit')
+    args = parser.parse_args()
+    prompt_settings["max_prompt_tokens"] = args.max_prompt_tokens
+    log_settings["verbose"] = args.verbose
+    stream_settings["stream"] = args.stream
+    if args.no_reasoning:
+        stream_settings["reasoning"] = False
+    cache_settings.update(cache_dir=args.cache_dir, max_entries=args.cache_max_entries, ttl_s=args.cache_ttl_hours * 3600)
+    if args.cache_stats:
+        print(json.dumps(get_cache().stats()))
+        return
+    use_cache = not args.no_cache
+    try:
+        client = create_client(use_async=args.batch)
+    except RuntimeError as e:
+        # A resident worker or a batch still serves re-weights, cached
+        # responses and local scores; only a single scoring run gives up
+        if not (args.serve or args.batch):
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"Warning: {e} Scoring locally.", file=sys.stderr)
+        client = None
+    if args.serve:
+        serve(client, max(1, args.workers), use_cache)
+        return
+    if args.input:
+        with open(args.input, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    else:
+        data = json.load(sys.stdin)
+    
+    if args.batch:
+        limiter = TokenBucket(args.requests_per_minute, args.tokens_per_minute)
+        asyncio.run(score_batch(data, client, limiter, max(1, args.concurrency), sys.stdout, use_cache, max(0, args.shortlist), args.incremental))
+        return
+    result = score_application(data, client, use_cache)
     print(json.dumps(result, ensure_ascii=False))
 
 if __name__ == "__main__":
@@ -0,0 +1,189 @@
+import sys
+import os
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import extract_resume_text
+from extract_resume_text import handle_request, file_format, UNSUPPORTED_FORMAT_TEXT
+
+# Bulk resume text extraction for the uploads corpus.
+#
+# Usage:
+#   python backfill_resume_text.py --dir uploads > results.jsonl
+#   python backfill_resume_text.py --missing --write-db --manifest backfill.manifest
+#   python backfill_resume_text.py --candidate-ids 12 15 18 --write-db
+#
+# One JSON line is written per file as soon as it finishes:
+#   {"file_path": ..., "candidate_ids": [...], "text": ..., "sections": [...], "chars": ..., "cached": ..., "elapsed_ms": ...}
+# or the same with "error" instead of "text" (unsupported formats, e.g. .doc
+# uploads, are errors too). With --manifest, finished files are recorded so a
+# rerun after a crash skips them. With --write-db, candidates.resume_text and
+# resume_sections are updated in batches; a file only reaches the manifest
+# once its batch has been committed. Truncated extractions (an extraction
+# budget ran out) are never written to the database; they are counted and
+# recorded in the manifest as "truncated", so a rerun retries them.
+
+def find_resume_files(directory):
+    files = []
+    for root, _, names in os.walk(directory):
+        for name in sorted(names):
+            if file_format(name):
+                files.append(os.path.join(root, name))
+    return files
+
+def connect_db():
+    # Only needed for --write-db / --candidate-ids / --missing
+    from sqlalchemy import create_engine
+    db_url = os.environ.get("DATABASE_URL")
+    if not db_url:
+        print("Error: DATABASE_URL environment variable not found.", file=sys.stderr)
+        sys.exit(1)
+    return create_engine(db_url)
+
+def load_candidates(engine, candidate_ids=None, missing_only=False):
+    # Returns {resume filename: [candidate ids]}
+    from sqlalchemy import text
+    query = "SELECT id, resume_url FROM candidates WHERE resume_url IS NOT NULL"
+    params = {}
+    if candidate_ids:
+        query += " AND id = ANY(:ids)"
+        params["ids"] = list(candidate_ids)
+    if missing_only:
+        query += " AND (resume_text IS NULL OR resume_text = '')"
+    by_filename = {}
+    with engine.connect() as conn:
+        for candidate_id, resume_url in conn.execute(text(query), params):
+            by_filename.setdefault(os.path.basename(resume_url), []).append(candidate_id)
+    return by_filename
+
+def write_resume_texts(engine, rows):
+    # rows are (candidate id, text, sections); both columns are written
+    # together so the section offsets always match the stored text
+    from sqlalchemy import text
+    if not rows:
+        return
+    with engine.begin() as conn:
+        conn.execute(
+            text("UPDATE candidates SET resume_text = :resume_text, resume_sections = CAST(:resume_sections AS json) WHERE id = :id"),
+            [
+                {"id": candidate_id, "resume_text": resume_text, "resume_sections": json.dumps(sections)}
+                for candidate_id, resume_text, sections in rows
+            ],
+        )
+
+def load_manifest(path):
+    done = set()
+    if path and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # partially written line from a crash
+                if entry.get("status") == "ok":
+                    done.add(entry["file_path"])
+    return done
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk resume text extraction and backfill")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--dir', type=str, help='Directory of resume files to extract (e.g. uploads)')
+    source.add_argument('--candidate-ids', type=int, nargs='+', help='Extract the resumes of these candidates')
+    source.add_argument('--missing', action='store_true', help='Extract resumes of candidates with an empty resume_text')
+    parser.add_argument('--uploads-dir', type=str, default='uploads', help='Where resume_url files live for --candidate-ids/--missing')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Files extracted in parallel')
+    parser.add_argument('--ocr-workers', type=int, default=1, help='OCR processes per scanned file')
+    parser.add_argument('--output', type=str, help='Write JSONL results here instead of stdout')
+    parser.add_argument('--manifest', type=str, help='Resumable manifest of finished files')
+    parser.add_argument('--write-db', action='store_true', help='Update candidates.resume_text in the database')
+    parser.add_argument('--batch-size', type=int, default=50, help='Rows per database update batch')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the extracted-text cache')
+    args = parser.parse_args()
+
+    # Parallelism comes from extracting many files at once
+    extract_resume_text.ocr_settings["workers"] = max(1, args.ocr_workers)
+
+    engine = connect_db() if (args.write_db or not args.dir) else None
+    if args.dir:
+        files = find_resume_files(args.dir)
+        candidates_by_file = load_candidates(engine) if engine else {}
+    else:
+        candidates_by_file = load_candidates(engine, args.candidate_ids, args.missing)
+        files = [os.path.join(args.uploads_dir, name) for name in sorted(candidates_by_file)]
+
+    done = load_manifest(args.manifest)
+    pending_files = [f for f in files if f not in done]
+    print(f"{len(files)} files, {len(files) - len(pending_files)} already done, {len(pending_files)} to extract", file=sys.stderr)
+
+    out = open(args.output, "a", encoding="utf-8") if args.output else sys.stdout
+    manifest = open(args.manifest, "a", encoding="utf-8") if args.manifest else None
+    db_rows, db_files = [], []
+    counts = {"ok": 0, "error": 0, "truncated": 0}
+
+    def record(file_path, status):
+        if manifest:
+            manifest.write(json.dumps({"file_path": file_path, "status": status}) + "\n")
+            manifest.flush()
+
+    def flush_db():
+        write_resume_texts(engine, db_rows)
+        for file_path in db_files:
+            record(file_path, "ok")
+        db_rows.clear()
+        db_files.clear()
+
+    try:
+        # Page images of all concurrent OCR share one ceiling, as in --serve
+        memory_gate = extract_resume_text.MemoryGate(extract_resume_text.ocr_settings["total_memory_mb"])
+        with ProcessPoolExecutor(
+            max_workers=max(1, args.workers),
+            initializer=extract_resume_text.init_extraction_worker,
+            initargs=(memory_gate,),
+        ) as pool:
+            futures = [
+                pool.submit(handle_request, {"id": f, "file_path": f, "cache": not args.no_cache, "sections": True})
+                for f in pending_files
+            ]
+            for future in as_completed(futures):
+                response = future.result()
+                file_path = response.pop("id")
+                candidate_ids = candidates_by_file.get(os.path.basename(file_path), [])
+                result = {"file_path": file_path, "candidate_ids": candidate_ids}
+                if response.get("text") == UNSUPPORTED_FORMAT_TEXT:
+                    response = {"error": UNSUPPORTED_FORMAT_TEXT, "elapsed_ms": response["elapsed_ms"]}
+                if "error" in response:
+                    result.update(error=response["error"], elapsed_ms=response["elapsed_ms"])
+                    counts["error"] += 1
+                    record(file_path, "error")
+                elif response.get("truncated"):
+                    # Partial text would stop the candidate showing up under --missing
+                    result.update(response, chars=len(response["text"]))
+                    counts["truncated"] += 1
+                    record(file_path, "truncated")
+                else:
+                    result.update(response, chars=len(response["text"]))
+                    counts["ok"] += 1
+                    if args.write_db and candidate_ids:
+                        # Postgres text columns reject NUL bytes; replacing them
+                        # with spaces keeps the section offsets valid
+                        resume_text = response["text"].replace("\x00", " ")
+                        db_rows.extend((candidate_id, resume_text, response["sections"]) for candidate_id in candidate_ids)
+                        db_files.append(file_path)
+                        if len(db_files) >= args.batch_size:
+                            flush_db()
+                    else:
+                        record(file_path, "ok")
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                out.flush()
+        if args.write_db:
+            flush_db()
+    finally:
+        if manifest:
+            manifest.close()
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"Done: {counts['ok']} extracted, {counts['truncated']} truncated, {counts['error']} failed", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
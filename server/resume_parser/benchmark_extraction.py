@@ -0,0 +1,183 @@
+import sys
+import os
+import json
+import time
+import argparse
+import resource
+import statistics
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+import extract_resume_text
+import pdf_engines
+from extract_resume_text import extract_all_text, file_format, EXTRACTOR_VERSION, UNSUPPORTED_FORMAT_TEXT
+from backfill_resume_text import find_resume_files
+
+# Benchmark extract_all_text over a resume corpus.
+#
+# Usage:
+#   python benchmark_extraction.py uploads --output baseline.json
+#   python benchmark_extraction.py uploads --compare baseline.json [--threshold 0.2]
+#
+# Every file is extracted in its own fresh process (timed after imports, cache
+# bypassed) so peak RSS is per file. Reported per file: wall time,
+# pages, pages/sec, path taken (text / ocr / mixed / docx / error), engines,
+# characters extracted and peak RSS. --compare exits with status 1 if any
+# file or the aggregate regressed against the baseline.
+
+def _peak_rss_mb():
+    # ru_maxrss is in KiB on Linux; children covers pdftoppm/tesseract/pdftotext
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    return round(peak / 1024, 1)
+
+def measure_file(file_path, repeat, pdf_engine, ocr_workers):
+    # Runs in a spawned child, so settings are passed in rather than inherited
+    extract_resume_text.pdf_settings["engine"] = pdf_engine
+    extract_resume_text.ocr_settings["workers"] = ocr_workers
+    timings = []
+    details = {}
+    result = {"file": file_path}
+    try:
+        for _ in range(repeat):
+            details = {}
+            start = time.perf_counter()
+            text = extract_all_text(file_path, details)
+            timings.append(time.perf_counter() - start)
+            if text == UNSUPPORTED_FORMAT_TEXT:
+                raise ValueError(UNSUPPORTED_FORMAT_TEXT)
+    except Exception as e:
+        result.update(path="error", error=str(e), peak_rss_mb=_peak_rss_mb())
+        return result
+
+    wall = statistics.median(timings)
+    pages = details.get("pages")
+    ocr_pages = details.get("ocr_pages", [])
+    if file_format(file_path) == ".docx":
+        path = "docx"
+    elif not ocr_pages:
+        path = "text"
+    elif len(ocr_pages) == pages:
+        path = "ocr"
+    else:
+        path = "mixed"
+    result.update(
+        path=path,
+        engines=details.get("engines", []),
+        wall_ms=round(wall * 1000, 1),
+        pages=pages,
+        pages_per_sec=round(pages / wall, 2) if pages and wall else None,
+        ocr_pages=len(ocr_pages),
+        chars=len(text),
+        peak_rss_mb=_peak_rss_mb(),
+    )
+    return result
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+def aggregate(results):
+    ok = [r for r in results if r["path"] != "error"]
+    walls = [r["wall_ms"] for r in ok]
+    total_wall_s = sum(walls) / 1000
+    total_pages = sum(r["pages"] or 0 for r in ok)
+    paths = {}
+    for r in results:
+        paths[r["path"]] = paths.get(r["path"], 0) + 1
+    return {
+        "files": len(results),
+        "errors": len(results) - len(ok),
+        "paths": paths,
+        "total_wall_ms": round(total_wall_s * 1000, 1),
+        "p50_wall_ms": _percentile(walls, 0.5) if walls else None,
+        "p95_wall_ms": _percentile(walls, 0.95) if walls else None,
+        "pages": total_pages,
+        "pages_per_sec": round(total_pages / total_wall_s, 2) if total_wall_s else None,
+        "chars": sum(r["chars"] for r in ok),
+        "max_peak_rss_mb": max((r["peak_rss_mb"] for r in results), default=None),
+    }
+
+def compare(baseline, current, threshold, min_delta_ms):
+    # Returns a list of human-readable regressions
+    regressions = []
+    base_files = {r["file"]: r for r in baseline["files"]}
+    for r in current["files"]:
+        base = base_files.get(r["file"])
+        if base is None:
+            continue
+        name = os.path.basename(r["file"])
+        if r["path"] == "error" and base["path"] != "error":
+            regressions.append(f"{name}: now fails ({r.get('error')})")
+            continue
+        if base["path"] == "error" or r["path"] == "error":
+            continue
+        if r["path"] != base["path"]:
+            regressions.append(f"{name}: path changed {base['path']} -> {r['path']}")
+        if r["wall_ms"] > base["wall_ms"] * (1 + threshold) and r["wall_ms"] - base["wall_ms"] > min_delta_ms:
+            regressions.append(f"{name}: wall time {base['wall_ms']}ms -> {r['wall_ms']}ms")
+        if r["chars"] < base["chars"] * (1 - threshold):
+            regressions.append(f"{name}: chars {base['chars']} -> {r['chars']}")
+        if r["peak_rss_mb"] > base["peak_rss_mb"] * (1 + threshold):
+            regressions.append(f"{name}: peak RSS {base['peak_rss_mb']}MB -> {r['peak_rss_mb']}MB")
+    base_agg, agg = baseline["aggregate"], current["aggregate"]
+    for key in ("total_wall_ms", "p95_wall_ms"):
+        if base_agg.get(key) and agg.get(key) and agg[key] > base_agg[key] * (1 + threshold):
+            regressions.append(f"aggregate {key}: {base_agg[key]} -> {agg[key]}")
+    if base_agg.get("pages_per_sec") and agg.get("pages_per_sec") and agg["pages_per_sec"] < base_agg["pages_per_sec"] * (1 - threshold):
+        regressions.append(f"aggregate pages_per_sec: {base_agg['pages_per_sec']} -> {agg['pages_per_sec']}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark resume text extraction")
+    parser.add_argument('directory', help='Directory of resumes, e.g. uploads')
+    parser.add_argument('--output', type=str, help='Write results as a JSON baseline file')
+    parser.add_argument('--compare', type=str, help='Baseline JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Relative change counted as a regression')
+    parser.add_argument('--min-delta-ms', type=float, default=10.0, help='Ignore wall time changes smaller than this')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per file; the median wall time is reported')
+    parser.add_argument('--pdf-engine', choices=pdf_engines.ENGINE_CHOICES, default=extract_resume_text.pdf_settings["engine"], help='PDF text-layer engine to benchmark')
+    parser.add_argument('--ocr-workers', type=int, default=extract_resume_text.ocr_settings["workers"] or os.cpu_count() or 1, help='OCR processes per scanned file')
+    args = parser.parse_args()
+
+    files = find_resume_files(args.directory)
+    results = []
+    # One task per fresh child keeps ru_maxrss per file
+    with ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as pool:
+        settings = (max(1, args.repeat), args.pdf_engine, max(1, args.ocr_workers))
+        for result in pool.map(measure_file, files, *[[value] * len(files) for value in settings]):
+            results.append(result)
+            if result["path"] == "error":
+                print(f"{os.path.basename(result['file'])}: error: {result['error']}", file=sys.stderr)
+            else:
+                print(
+                    f"{os.path.basename(result['file'])}: {result['path']} {result['wall_ms']}ms "
+                    f"{result['chars']} chars {result['peak_rss_mb']}MB",
+                    file=sys.stderr,
+                )
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "extractor_version": EXTRACTOR_VERSION,
+        "pdf_engine": args.pdf_engine,
+        "aggregate": aggregate(results),
+        "files": results,
+    }
+    print(json.dumps(report["aggregate"], indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold, args.min_delta_ms)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print("No regressions", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+from benchmark_extraction import _percentile
+
+# Load test for ai_scoring.py --batch against the Groq stand-in
+# (groq_standin.py), so throughput and tail latency of our own code can be
+# measured without network access or API spend.
+#
+# Usage:
+#   python groq_standin.py serve --latency-ms 300 --rate-429 0.05 &
+#   python benchmark_scoring.py --copies 200 [--concurrency 16] [--base-url http://127.0.0.1:8765]
+#
+# Every input (sample_input.json and test_input.json by default) is repeated
+# --copies times and scored in one batch with the cache off. Reported: wall
+# time, applications per second, errors, how many results fell back to local
+# scoring, and p50/p95/p99 of each application's own latency: its
+# Metrics.total_ms (from parsing to result, queueing for a batch slot and the
+# rate limiter included) and llm_ms (the API call alone).
+
+def percentiles(name, values):
+    return {f"{name}_p{int(q * 100)}_ms": round(_percentile(values, q), 1) if values else None for q in (0.5, 0.95, 0.99)}
+
+def main():
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Load test AI scoring against the Groq stand-in")
+    parser.add_argument('inputs', nargs='*', help='Scoring input JSON files (default: sample_input.json test_input.json)')
+    parser.add_argument('--copies', type=int, default=50, help='Times each input is repeated in the batch')
+    parser.add_argument('--concurrency', type=int, default=8, help='Passed to ai_scoring.py --concurrency')
+    parser.add_argument('--base-url', type=str, default='http://127.0.0.1:8765', help='Groq stand-in URL')
+    parser.add_argument('--requests-per-minute', type=int, default=100000, help='Scoring limiter setting; high by default so the stand-in sets the pace')
+    parser.add_argument('--tokens-per-minute', type=int, default=100000000, help='Scoring limiter setting')
+    parser.add_argument('--scoring-args', type=str, default='', help='Extra ai_scoring.py arguments, e.g. "--stream --no-reasoning"')
+    args = parser.parse_args()
+
+    items = []
+    for path in args.inputs or [os.path.join(here, "sample_input.json"), os.path.join(here, "test_input.json")]:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        items.extend(data if isinstance(data, list) else [data])
+    batch = [dict(item, id=len(items) * copy + i) for copy in range(max(1, args.copies)) for i, item in enumerate(items)]
+
+    command = [
+        sys.executable, os.path.join(here, "ai_scoring.py"), "--batch", "--no-cache",
+        "--concurrency", str(args.concurrency),
+        "--requests-per-minute", str(args.requests_per_minute),
+        "--tokens-per-minute", str(args.tokens_per_minute),
+    ] + args.scoring_args.split()
+    env = dict(os.environ, GROQ_BASE_URL=args.base_url, GROQ_API_KEY=os.environ.get("GROQ_API_KEY", "standin"))
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=env, text=True)
+    process.stdin.write(json.dumps(batch))
+    process.stdin.close()
+
+    results, latencies, llm_latencies, errors, local = 0, [], [], 0, 0
+    for line in process.stdout:
+        try:
+            result = json.loads(line)
+        except ValueError:
+            continue
+        results += 1
+        metrics = result.get("Metrics") or {}
+        if metrics.get("total_ms") is not None:
+            latencies.append(metrics["total_ms"])
+        if metrics.get("llm_ms"):
+            llm_latencies.append(metrics["llm_ms"])
+        if result.get("error"):
+            errors += 1
+        elif result.get("ScoredBy") == "local":
+            local += 1
+    process.wait()
+    wall_s = time.perf_counter() - start
+
+    report = {
+        "applications": len(batch),
+        "results": results,
+        "errors": errors,
+        "local_fallbacks": local,
+        "wall_ms": round(wall_s * 1000, 1),
+        "applications_per_sec": round(results / wall_s, 2) if wall_s else None,
+        **percentiles("latency", latencies),
+        **percentiles("llm", llm_latencies),
+        "exit_code": process.returncode,
+    }
+    print(json.dumps(report, indent=2))
+    if process.returncode:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import re
+import zipfile
+from lxml import etree
+
+# Streaming .docx text extraction. Reads the WordprocessingML parts straight
+# from the zip with iterparse instead of building python-docx's object model,
+# and keeps what python-docx's doc.paragraphs drops: tables (one line per row,
+# cells separated by tabs), headers/footers and text boxes.
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+
+TAGS = [W + name for name in ("p", "r", "t", "tab", "br", "cr", "tc", "tr")] + [MC_FALLBACK]
+
+_HEADER_PATTERN = re.compile(r"^word/header\d*\.xml$")
+_FOOTER_PATTERN = re.compile(r"^word/footer\d*\.xml$")
+
+def _part_number(name):
+    digits = re.findall(r"\d+", name)
+    return int(digits[-1]) if digits else 0
+
+def iter_part_lines(stream):
+    # Yields one line per paragraph outside tables and one per table row.
+    paragraphs = []  # text buffers of the paragraphs currently open (text boxes nest them)
+    rows = []        # cells of the table rows currently open (tables can nest)
+    cells = []       # paragraph lines of the cells currently open
+    fallback_depth = 0
+    run_depth = 0  # w:tab also appears in paragraph properties as a tab stop
+
+    # Let lxml filter tags in C; the formatting elements never reach Python
+    for event, elem in etree.iterparse(stream, events=("start", "end"), tag=TAGS, huge_tree=True):
+        tag = elem.tag
+        if event == "start":
+            if tag == MC_FALLBACK:
+                # Legacy VML copy of a text box we already read from mc:Choice
+                fallback_depth += 1
+            elif fallback_depth:
+                continue
+            elif tag == W + "r":
+                run_depth += 1
+            elif tag == W + "p":
+                paragraphs.append([])
+            elif tag == W + "tr":
+                rows.append([])
+            elif tag == W + "tc":
+                cells.append([])
+            continue
+
+        if tag == MC_FALLBACK:
+            fallback_depth -= 1
+            elem.clear()
+            continue
+        if fallback_depth:
+            continue
+
+        if tag == W + "r":
+            run_depth -= 1
+        elif tag == W + "t" and paragraphs:
+            paragraphs[-1].append(elem.text or "")
+        elif tag == W + "tab" and paragraphs and run_depth:
+            paragraphs[-1].append("\t")
+        elif tag in (W + "br", W + "cr") and paragraphs:
+            paragraphs[-1].append("\n")
+        elif tag == W + "p":
+            text = "".join(paragraphs.pop())
+            if cells:
+                cells[-1].append(text)
+            else:
+                yield text
+            elem.clear()
+        elif tag == W + "tc":
+            cell = " ".join(line for line in cells.pop() if line.strip())
+            if rows:
+                rows[-1].append(cell)
+            elem.clear()
+        elif tag == W + "tr":
+            row = "\t".join(cell for cell in rows.pop() if cell)
+            if cells:
+                # Nested table: the row becomes part of the enclosing cell
+                cells[-1].append(row)
+            elif row:
+                yield row
+            elem.clear()
+
+def extract_docx_text(file_path):
+    with zipfile.ZipFile(file_path) as archive:
+        names = archive.namelist()
+        headers = sorted((n for n in names if _HEADER_PATTERN.match(n)), key=_part_number)
+        footers = sorted((n for n in names if _FOOTER_PATTERN.match(n)), key=_part_number)
+
+        def read_parts(parts):
+            # First-page/even-page variants often repeat the default text
+            blocks, seen = [], set()
+            for part in parts:
+                with archive.open(part) as stream:
+                    block = "\n".join(line for line in iter_part_lines(stream) if line.strip())
+                if block and block not in seen:
+                    seen.add(block)
+                    blocks.append(block)
+            return blocks
+
+        with archive.open("word/document.xml") as stream:
+            body = list(iter_part_lines(stream))
+        return "\n".join(read_parts(headers) + body + read_parts(footers))
@@ -1,57 +1,447 @@
 import sys
 import os
-import pdfplumber
-import docx
+import json
+import time
+import argparse
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import threading
+from contextlib import nullcontext, contextmanager
 import pytesseract
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
 from PIL import Image
+import pdf_engines
+from docx_reader import extract_docx_text
+from extraction_budget import ExtractionBudget, DeadlineExceeded
+from resume_sections import segment_sections
+from extraction_cache import ExtractionCache, file_digest, DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES
 
-# Usage: python extract_resume_text.py <file_path>
+# Usage: python extract_resume_text.py <file_path> [--no-cache]
+#        python extract_resume_text.py --serve [--workers N]
+#        python extract_resume_text.py --cache-stats
+#
+# In --serve mode the process stays alive and reads newline-delimited JSON
+# requests from stdin, e.g. {"id": 1, "file_path": "uploads/resume-1.pdf"},
+# and writes one JSON response per line to stdout as each one finishes:
+# {"id": 1, "text": "...", "cached": false, "truncated": null, "elapsed_ms": 123.4}
+# or {"id": 1, "error": "...", "elapsed_ms": 1.2}. Responses may come back out
+# of order; match them on "id". Send "cache": false in a request to bypass the
+# extraction cache. When a resource budget runs out, "text" is partial and
+# "truncated" is e.g. {"reason": "max_pages", "pages_total": 200}. Send
+# "sections": true to also get "sections" (see resume_sections.py).
 
-def extract_all_text(file_path):
-    if file_path.endswith(".pdf"):
+# Bump whenever extraction output changes so stale cache entries are ignored
+EXTRACTOR_VERSION = "4"
+
+cache_settings = {"cache_dir": DEFAULT_CACHE_DIR, "max_bytes": DEFAULT_MAX_BYTES}
+_cache = None
+_cache_pid = None
+
+# Default per-document resource budgets (unset = unlimited); --serve requests
+# can override them with "budget": {"max_pages": 20, "deadline_s": 30, ...}
+budget_settings = {
+    "max_pages": int(os.environ.get("RESUME_MAX_PAGES", "0")) or None,
+    "max_pixels": int(os.environ.get("RESUME_MAX_PIXELS", "0")) or None,
+    "deadline_s": float(os.environ.get("RESUME_DEADLINE_S", "0")) or None,
+    "max_memory_mb": int(os.environ.get("RESUME_MAX_MEMORY_MB", "0")) or None,
+}
+
+# Text-layer engine for PDFs: "auto" escalates fast -> pypdf -> pdfplumber per page
+pdf_settings = {"engine": os.environ.get("RESUME_PDF_ENGINE", "auto")}
+
+# OCR settings for PDFs without a text layer. Pages are rasterized one at a
+# time from page ranges; at most as many pages as fit in max_memory_mb are
+# held in memory at once (across all OCR workers for one document). In
+# --serve mode total_memory_mb caps the page images of all concurrent
+# extractions together (see MemoryGate). workers defaults to the CPU count
+# for a single file and to 1 with --serve, where the pool of extractions is
+# what uses the cores.
+ocr_settings = {
+    "workers": int(os.environ.get("RESUME_OCR_WORKERS", "0")) or None,
+    "dpi": int(os.environ.get("RESUME_OCR_DPI", "200")),
+    "max_memory_mb": int(os.environ.get("RESUME_OCR_MAX_MEMORY_MB", "512")),
+    "total_memory_mb": int(os.environ.get("RESUME_OCR_TOTAL_MEMORY_MB", "1024")),
+}
+# RGB bytes per pixel, doubled for the pdftoppm pipe buffer plus the decoded image
+BYTES_PER_PIXEL = 3 * 2
+DEFAULT_PAGE_SIZE_PTS = (612.0, 792.0)  # US Letter
+
+class MemoryGate:
+    # Process-wide ceiling on OCR page images, shared by the worker processes
+    # of a pool. Each document reserves what its rasterization can hold at
+    # once before OCR starts, all or nothing, and waits while the total
+    # would go over the ceiling.
+    def __init__(self, total_mb):
+        self.total_mb = max(1, total_mb)
+        self.used_mb = multiprocessing.Value("i", 0, lock=False)
+        self.condition = multiprocessing.Condition()
+
+    @contextmanager
+    def reserve(self, mb, timeout=None):
+        # Yields False if the memory did not free up within timeout
+        mb = min(max(1, math.ceil(mb)), self.total_mb)
+        with self.condition:
+            reserved = self.condition.wait_for(lambda: self.used_mb.value + mb <= self.total_mb, timeout)
+            if reserved:
+                self.used_mb.value += mb
         try:
-            text = ""
-            with pdfplumber.open(file_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-            if not text.strip():
-                raise Exception("Use OCR")
-        except:
-            # OCR fallback
-            text = ""
-            images = convert_from_path(file_path)
-            for image in images:
-                text += pytesseract.image_to_string(image) + "\n"
-        return text
-
-    elif file_path.endswith(".docx"):
-        doc = docx.Document(file_path)
-        return "\n".join([para.text for para in doc.paragraphs])
-
-    else:
-        return "Unsupported file format"
+            yield reserved
+        finally:
+            if reserved:
+                with self.condition:
+                    self.used_mb.value -= mb
+                    self.condition.notify_all()
 
-if __name__ == "__main__":
-    if len(sys.argv) != 2:
+_memory_gate = None
+
+def init_extraction_worker(memory_gate):
+    # Pool initializer: every extraction process shares the one gate
+    global _memory_gate
+    _memory_gate = memory_gate
+
+def _init_ocr_worker():
+    # One tesseract thread per page process, otherwise pages fight over cores
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+def page_size_points(info):
+    # pdfinfo reports e.g. "595.276 x 841.89 pts (A4)"
+    try:
+        width, _, height = info["Page size"].split()[:3]
+        return float(width), float(height)
+    except (KeyError, ValueError):
+        return DEFAULT_PAGE_SIZE_PTS
+
+def page_image_bytes(info, dpi):
+    width, height = page_size_points(info)
+    return (width / 72 * dpi) * (height / 72 * dpi) * BYTES_PER_PIXEL
+
+def plan_rasterization(info, dpi, max_memory_mb):
+    # Returns (dpi, pages_in_memory). The DPI is lowered if a single page
+    # would not fit under the ceiling on its own.
+    budget = max_memory_mb * 1024 * 1024
+    page_bytes = page_image_bytes(info, dpi)
+    if page_bytes > budget:
+        dpi = max(1, int(dpi * math.sqrt(budget / page_bytes)))
+        page_bytes = page_image_bytes(info, dpi)
+    return dpi, max(1, int(budget // page_bytes))
+
+def ocr_page(file_path, page_number, dpi=200, timeout=None):
+    images = convert_from_path(file_path, dpi=dpi, first_page=page_number, last_page=page_number, timeout=timeout)
+    return "\n".join(pytesseract.image_to_string(image, timeout=timeout or 0) for image in images)
+
+def ocr_pages(file_path, page_numbers, workers=None, dpi=None, max_memory_mb=None, info=None, budget=None):
+    # OCR the given 1-based pages and return their text in the same order.
+    # Under a budget the result may stop short; budget.truncated says why.
+    info = info or pdfinfo_from_path(file_path)
+    max_memory_mb = max_memory_mb or ocr_settings["max_memory_mb"]
+    if budget and budget.max_memory_mb:
+        max_memory_mb = min(max_memory_mb, budget.max_memory_mb)
+    dpi, pages_in_memory = plan_rasterization(info, dpi or ocr_settings["dpi"], max_memory_mb)
+    page_numbers = list(page_numbers)
+    if budget and budget.max_pixels:
+        width, height = page_size_points(info)
+        page_pixels = (width / 72 * dpi) * (height / 72 * dpi)
+        affordable = max(0, int((budget.max_pixels - budget.pixels_used) // page_pixels))
+        if affordable < len(page_numbers):
+            budget.truncate("max_pixels", ocr_pages_skipped=page_numbers[affordable:])
+            page_numbers = page_numbers[:affordable]
+        budget.pixels_used += page_pixels * len(page_numbers)
+    if not page_numbers:
+        return []
+
+    def remaining():
+        return budget.remaining() if budget else None
+
+    workers = min(workers or ocr_settings["workers"] or os.cpu_count() or 1, pages_in_memory, len(page_numbers))
+    if _memory_gate is None:
+        return _ocr_pages(file_path, page_numbers, workers, dpi, budget)
+    # One page image per OCR process is held at a time
+    page_mb = page_image_bytes(info, dpi) / (1024 * 1024)
+    workers = max(1, min(workers, int(_memory_gate.total_mb // page_mb)))
+    with _memory_gate.reserve(workers * page_mb, remaining()) as reserved:
+        if not reserved:
+            budget.expired()
+            return []
+        return _ocr_pages(file_path, page_numbers, workers, dpi, budget)
+
+def _ocr_pages(file_path, page_numbers, workers, dpi, budget):
+    def remaining():
+        return budget.remaining() if budget else None
+
+    texts = []
+    if workers <= 1:
+        for n in page_numbers:
+            if budget and budget.expired():
+                break
+            try:
+                texts.append(ocr_page(file_path, n, dpi, remaining()))
+            except Exception:
+                if budget and budget.expired():
+                    break
+                raise
+        return texts
+
+    # Each worker rasterizes its own page, so no images are pickled between
+    # processes; results are collected in submission order.
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_ocr_worker)
+    try:
+        futures = [pool.submit(ocr_page, file_path, n, dpi, remaining()) for n in page_numbers]
+        for future in futures:
+            texts.append(future.result(timeout=remaining()))
+    except Exception:
+        if not (budget and budget.expired()):
+            raise
+    finally:
+        # Pages already running stop on their own poppler/tesseract timeouts
+        pool.shutdown(wait=False, cancel_futures=True)
+    return texts
+
+def ocr_pdf(file_path, details=None, budget=None, **kwargs):
+    if budget and budget.expired():
+        return ""
+    info = pdfinfo_from_path(file_path)
+    page_numbers = list(range(1, info["Pages"] + 1))
+    if budget and budget.max_pages and len(page_numbers) > budget.max_pages:
+        budget.truncate("max_pages", pages_total=len(page_numbers))
+        page_numbers = page_numbers[:budget.max_pages]
+    texts = ocr_pages(file_path, page_numbers, info=info, budget=budget, **kwargs)
+    if details is not None:
+        details.update(pages=info["Pages"], engines=[], ocr_pages=page_numbers[:len(texts)])
+    return "".join(text + "\n" for text in texts)
+
+def extract_pdf_text(file_path, details=None, budget=None):
+    # Each page's text layer is read with the cheapest engine that gives
+    # clean text (see pdf_engines); only pages without a usable text layer
+    # are rasterized and OCR'd, so mixed PDFs (typed CV plus scanned
+    # certificates) neither pay OCR for every page nor lose the scanned ones.
+    # details, if given, is filled with pages, engines used and OCR'd pages
+    page_numbers = None
+    if budget and budget.max_pages:
+        try:
+            pages_total = pdf_engines.page_count(file_path)
+        except Exception:
+            pages_total = None  # unreadable page tree; the engines/OCR will report it
+        if pages_total and pages_total > budget.max_pages:
+            budget.truncate("max_pages", pages_total=pages_total)
+            page_numbers = list(range(1, budget.max_pages + 1))
+    try:
+        page_texts, engines = pdf_engines.extract_pages(file_path, pdf_settings["engine"], page_numbers, budget)
+    except Exception as e:
+        print(f"No text engine could read {file_path}, using OCR: {e}", file=sys.stderr)
+        return ocr_pdf(file_path, details, budget)
+
+    scanned = [
+        n for n, text in enumerate(page_texts, start=1)
+        if not text.strip() or pdf_engines.is_garbage(text)
+    ]
+    if not any(text.strip() for text in page_texts):
+        return ocr_pdf(file_path, details, budget)
+
+    ocr_texts = {}
+    if scanned:
+        try:
+            ocr_texts = dict(zip(scanned, ocr_pages(file_path, scanned, budget=budget)))
+        except Exception as e:
+            # Keep the text-layer pages rather than failing the whole document
+            print(f"OCR failed for pages {scanned}: {e}", file=sys.stderr)
+    if details is not None:
+        details.update(
+            pages=len(page_texts),
+            engines=sorted({engine for engine in engines if engine}),
+            ocr_pages=sorted(ocr_texts),
+        )
+
+    text = ""
+    for n, page_text in enumerate(page_texts, start=1):
+        if n in ocr_texts:
+            text += ocr_texts[n] + "\n"
+        elif page_text:
+            text += page_text + "\n"
+    return text
+
+# Returned as the text of files that are neither PDF nor DOCX
+UNSUPPORTED_FORMAT_TEXT = "Unsupported file format"
+SUPPORTED_FORMATS = (".pdf", ".docx")
+
+def file_format(file_path):
+    # ".pdf" or ".docx" whatever the extension's case (uploads keep the
+    # client's file name, e.g. resume.PDF), else None
+    extension = os.path.splitext(file_path)[1].lower()
+    return extension if extension in SUPPORTED_FORMATS else None
+
+def extract_all_text(file_path, details=None, budget=None):
+    # With a budget, partial text is returned when it runs out and
+    # details["truncated"] describes which limit was hit.
+    file_type = file_format(file_path)
+    try:
+        if file_type == ".pdf":
+            text = extract_pdf_text(file_path, details, budget)
+        elif file_type == ".docx":
+            with budget.alarm() if budget else nullcontext():
+                text = extract_docx_text(file_path)
+        else:
+            return UNSUPPORTED_FORMAT_TEXT
+    except DeadlineExceeded:
+        budget.truncate("deadline")
+        text = ""
+    except MemoryError:
+        if budget is None:
+            raise
+        budget.truncate("max_memory_mb")
+        text = ""
+    if budget and budget.truncated and details is not None:
+        details["truncated"] = budget.truncated
+    return text
+
+def get_cache():
+    global _cache, _cache_pid
+    # SQLite connections must not cross a fork, so every worker opens its own
+    if _cache is None or _cache_pid != os.getpid():
+        _cache = ExtractionCache(**cache_settings)
+        _cache_pid = os.getpid()
+    return _cache
+
+def extract_text_cached(file_path, use_cache=True, details=None, budget=None):
+    # Returns (text, cached). Truncated results are never cached. The key is
+    # the file's bytes only, so the format is checked first: the same bytes
+    # under an unsupported name must not get another file's cached text.
+    details = {} if details is None else details
+    if file_format(file_path) is None:
+        return UNSUPPORTED_FORMAT_TEXT, False
+    if not use_cache:
+        return extract_all_text(file_path, details, budget), False
+    cache = get_cache()
+    variant = "" if pdf_settings["engine"] == "auto" else pdf_settings["engine"]
+    key = cache.make_key(file_digest(file_path), EXTRACTOR_VERSION, variant)
+    text = cache.get(key)
+    if text is not None:
+        return text, True
+    text = extract_all_text(file_path, details, budget)
+    if not details.get("truncated"):
+        cache.put(key, text)
+    return text, False
+
+def handle_request(request):
+    start = time.perf_counter()
+    response = {"id": request.get("id")}
+    try:
+        file_path = request["file_path"]
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"File not found: {file_path}")
+        budget = ExtractionBudget.from_dict({**budget_settings, **(request.get("budget") or {})})
+        details = {}
+        response["text"], response["cached"] = extract_text_cached(file_path, request.get("cache", True), details, budget)
+        response["truncated"] = details.get("truncated")
+        if request.get("sections"):
+            response["sections"] = segment_sections(response["text"])
+    except Exception as e:
+        response["error"] = str(e)
+    response["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return response
+
+def serve(workers):
+    # Imports above are already loaded, so forked pool workers start warm.
+    write_lock = threading.Lock()
+
+    def respond(response):
+        with write_lock:
+            sys.stdout.write(json.dumps(response, ensure_ascii=False) + "\n")
+            sys.stdout.flush()
+
+    def on_done(request_id, future):
+        try:
+            respond(future.result())
+        except Exception as e:
+            # The pool itself failed (e.g. a worker was killed)
+            respond({"id": request_id, "error": str(e)})
+
+    memory_gate = MemoryGate(ocr_settings["total_memory_mb"])
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_extraction_worker, initargs=(memory_gate,)) as pool:
+        for line in sys.stdin:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                respond({"id": None, "error": f"Invalid request: {e}"})
+                continue
+            future = pool.submit(handle_request, request)
+            future.add_done_callback(lambda f, request_id=request.get("id"): on_done(request_id, f))
+
+def main():
+    parser = argparse.ArgumentParser(description="Resume text extraction")
+    parser.add_argument('file_path', nargs='?', help='Path to a .pdf or .docx resume')
+    parser.add_argument('--serve', action='store_true', help='Run as a long-lived worker reading JSON lines from stdin')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Concurrent extractions in --serve mode')
+    parser.add_argument('--pdf-engine', choices=pdf_engines.ENGINE_CHOICES, default=pdf_settings["engine"], help='PDF text-layer engine')
+    parser.add_argument('--ocr-workers', type=int, default=ocr_settings["workers"], help='Pages OCR\'d in parallel for scanned PDFs (default: CPU count, 1 with --serve)')
+    parser.add_argument('--ocr-dpi', type=int, default=ocr_settings["dpi"], help='Rasterization DPI for OCR')
+    parser.add_argument('--ocr-max-memory-mb', type=int, default=ocr_settings["max_memory_mb"], help='Ceiling for page images held in memory during OCR')
+    parser.add_argument('--ocr-total-memory-mb', type=int, default=ocr_settings["total_memory_mb"], help='Ceiling for page images across all concurrent extractions in --serve mode')
+    parser.add_argument('--max-pages', type=int, default=budget_settings["max_pages"], help='Only extract the first N pages')
+    parser.add_argument('--max-pixels', type=int, default=budget_settings["max_pixels"], help='Total pixels that may be rasterized for OCR')
+    parser.add_argument('--deadline', type=float, default=budget_settings["deadline_s"], help='Per-document wall-clock budget in seconds')
+    parser.add_argument('--max-memory-mb', type=int, default=budget_settings["max_memory_mb"], help='Memory cap for page images during OCR')
+    parser.add_argument('--json', action='store_true', help='Print {"text": ..., "truncated": ...} instead of plain text')
+    parser.add_argument('--sections', action='store_true', help='With --json, also print the detected resume sections and their offsets')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the extracted-text cache')
+    parser.add_argument('--cache-dir', type=str, default=DEFAULT_CACHE_DIR, help='Directory for the extracted-text cache')
+    parser.add_argument('--cache-max-mb', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024), help='Cache size limit before LRU eviction')
+    parser.add_argument('--cache-stats', action='store_true', help='Print cache hit/miss statistics as JSON and exit')
+    args = parser.parse_args()
+    cache_settings.update(cache_dir=args.cache_dir, max_bytes=args.cache_max_mb * 1024 * 1024)
+    pdf_settings["engine"] = args.pdf_engine
+    budget_settings.update(
+        max_pages=args.max_pages,
+        max_pixels=args.max_pixels,
+        deadline_s=args.deadline,
+        max_memory_mb=args.max_memory_mb,
+    )
+    # In --serve mode the extraction pool is the only parallelism knob;
+    # per-document OCR pools inside it would multiply up to cpu_count^2
+    ocr_workers = args.ocr_workers or (1 if args.serve else os.cpu_count() or 1)
+    ocr_settings.update(
+        workers=max(1, ocr_workers),
+        dpi=max(1, args.ocr_dpi),
+        max_memory_mb=max(1, args.ocr_max_memory_mb),
+        total_memory_mb=max(1, args.ocr_total_memory_mb),
+    )
+
+    # Ensure Unicode output regardless of terminal encoding
+    reconfigure = getattr(sys.stdout, 'reconfigure', None)
+    if callable(reconfigure):
+        reconfigure(encoding='utf-8')
+
+    if args.cache_stats:
+        print(json.dumps(get_cache().stats()))
+        return
+
+    if args.serve:
+        serve(max(1, args.workers))
+        return
+
+    if not args.file_path:
         print("Usage: python extract_resume_text.py <file_path>", file=sys.stderr)
         sys.exit(1)
-    file_path = sys.argv[1]
+    file_path = args.file_path
     if not os.path.exists(file_path):
         print(f"File not found: {file_path}", file=sys.stderr)
         sys.exit(1)
-    text = extract_all_text(file_path)
-    # Ensure Unicode output regardless of terminal encoding
+    details = {}
+    text, _ = extract_text_cached(file_path, not args.no_cache, details, ExtractionBudget.from_dict(budget_settings))
+    if args.json:
+        output = {"text": text, "truncated": details.get("truncated")}
+        if args.sections:
+            output["sections"] = segment_sections(text)
+        text = json.dumps(output, ensure_ascii=False)
+    elif details.get("truncated"):
+        print(f"Extraction truncated: {json.dumps(details['truncated'])}", file=sys.stderr)
     try:
-        # Only call reconfigure if it exists (Python 3.7+)
-        reconfigure = getattr(sys.stdout, 'reconfigure', None)
-        if callable(reconfigure):
-            reconfigure(encoding='utf-8')
-            print(text)
-        else:
-            # Fallback for older Python versions
-            print(text.encode('utf-8', errors='replace').decode('utf-8'))
+        print(text)
     except Exception:
-        print(text.encode('utf-8', errors='replace').decode('utf-8')) 
\ No newline at end of file
+        print(text.encode('utf-8', errors='replace').decode('utf-8'))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import time
+import signal
+import threading
+from contextlib import contextmanager
+
+# Resource budgets for a single extraction. When one runs out the extractor
+# stops early and returns the text it has so far, with budget.truncated set to
+# e.g. {"reason": "max_pages", "pages_total": 200, "pages_extracted": 30}.
+
+class DeadlineExceeded(BaseException):
+    # BaseException so the per-page "except Exception" handlers don't swallow it
+    pass
+
+class ExtractionBudget:
+    FIELDS = ("max_pages", "max_pixels", "deadline_s", "max_memory_mb")
+
+    def __init__(self, max_pages=None, max_pixels=None, deadline_s=None, max_memory_mb=None):
+        self.max_pages = max_pages
+        self.max_pixels = max_pixels
+        self.max_memory_mb = max_memory_mb
+        self.deadline = time.monotonic() + deadline_s if deadline_s else None
+        self.pixels_used = 0
+        self.truncated = None
+
+    @classmethod
+    def from_dict(cls, values):
+        return cls(**{field: values.get(field) for field in cls.FIELDS if values.get(field)})
+
+    def remaining(self):
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def expired(self):
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.truncate("deadline")
+            return True
+        return False
+
+    def truncate(self, reason, **info):
+        # The first budget to run out is the one reported
+        if self.truncated is None:
+            self.truncated = {"reason": reason, **info}
+
+    @contextmanager
+    def alarm(self):
+        # Hard stop for code that never returns to a budget check, such as
+        # pdfplumber spinning on one malformed page. Signals can only be
+        # delivered to the main thread, which is where extraction runs in
+        # both the CLI and the --serve pool workers.
+        if self.deadline is None or threading.current_thread() is not threading.main_thread():
+            yield
+            return
+
+        def on_alarm(signum, frame):
+            raise DeadlineExceeded()
+
+        previous = signal.signal(signal.SIGALRM, on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, max(self.remaining(), 0.001))
+        try:
+            yield
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
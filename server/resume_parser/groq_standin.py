@@ -0,0 +1,359 @@
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import hashlib
+import argparse
+import threading
+import urllib.request
+import urllib.error
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from extraction_cache import DEFAULT_CACHE_DIR
+from prompt_compaction import estimate_tokens
+
+# Local stand-in for the Groq (OpenAI-compatible) chat completions API, for
+# load and regression tests of ai_scoring.py and Chatbot/groq_db_v2.py without
+# network access or API spend. Point either script at it with
+#   GROQ_BASE_URL=http://127.0.0.1:8765 GROQ_API_KEY=test
+# (the Groq SDK appends /openai/v1/chat/completions).
+#
+# Usage:
+#   python groq_standin.py build-cassette [sample_input.json test_input.json] [--cassette path]
+#   python groq_standin.py serve [--mode replay|record|synthetic] [--latency-ms 300]
+#       [--tokens-per-second 800] [--rate-429 0.05] [--rate-413 0.01] [--max-request-tokens 6000]
+#
+# Responses come from a cassette: a JSON file of recorded responses keyed by a
+# hash of the model, messages and tools of the request.
+#   replay    - serve cassette entries; misses get a synthetic answer (or a
+#               404 with --strict)
+#   record    - forward misses to the real API (GROQ_UPSTREAM_URL, the
+#               caller's key) and save the answers in the cassette
+#   synthetic - ignore the cassette
+# build-cassette fills the cassette offline from scoring inputs: every prompt
+# variant ai_scoring.py sends for them, answered with local_scorer.py scores.
+#
+# Each response waits --latency-ms (plus up to --jitter-ms) before the first
+# token, then streams completion tokens at --tokens-per-second. --rate-429 and
+# --rate-413 inject rate-limit and request-too-large errors at random
+# (--seed makes them repeatable); requests over --max-request-tokens always
+# get a 413. GET /stats returns request and error counters.
+
+DEFAULT_CASSETTE = os.path.join(DEFAULT_CACHE_DIR, "groq_cassette.json")
+COMPLETIONS_PATH = "/openai/v1/chat/completions"
+SYNTHETIC_SCORES = {"EducationScore": 7, "SkillsScore": 6, "ExperienceYearsScore": 5, "ExperienceRelevanceScore": 6}
+
+standin_settings = {
+    "mode": "replay",
+    "strict": False,
+    "latency_ms": 300.0,
+    "jitter_ms": 100.0,
+    "tokens_per_second": 800.0,
+    "rate_429": 0.0,
+    "rate_413": 0.0,
+    "retry_after_s": 2.0,
+    "max_request_tokens": 0,
+    "upstream_url": os.environ.get("GROQ_UPSTREAM_URL", "https://api.groq.com"),
+}
+
+def request_key(body):
+    payload = json.dumps([body.get("model"), body.get("messages"), body.get("tools")], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class Cassette:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f).get("entries", {})
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        return entry["response"] if entry else None
+
+    def put(self, key, body, response):
+        with self.lock:
+            self.entries[key] = {
+                "model": body.get("model"),
+                "prompt_preview": str((body.get("messages") or [{}])[-1].get("content"))[:120],
+                "response": response,
+            }
+
+    def save(self):
+        with self.lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "entries": self.entries}, f, indent=1, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+def completion(model, content, prompt_tokens, tool_calls=None):
+    message = {"role": "assistant", "content": content}
+    if tool_calls:
+        message["tool_calls"] = tool_calls
+    completion_tokens = estimate_tokens(content or "")
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if tool_calls else "stop"}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+def prompt_tokens(body):
+    return sum(estimate_tokens(json.dumps(m.get("content"), ensure_ascii=False)) for m in body.get("messages") or [])
+
+def synthetic_content(body):
+    # Scoring prompts get a fixed, parseable answer in the order the prompt asks for
+    prompt = str((body.get("messages") or [{}])[-1].get("content") or "")
+    if "EducationScore" not in prompt:
+        return "This is a response from the Groq stand-in server."
+    scores = json.dumps(SYNTHETIC_SCORES, indent=2)
+    if "Start your answer with the JSON" in prompt:
+        if "Return only the JSON" in prompt:
+            return scores
+        return f"{scores}\nStand-in reasoning: scores are fixed for load testing."
+    return f"Stand-in analysis: scores are fixed for load testing.\n{scores}"
+
+def forward(body, authorization):
+    # Non-streaming call to the real API; streamed requests are re-streamed locally
+    request = urllib.request.Request(
+        standin_settings["upstream_url"].rstrip("/") + COMPLETIONS_PATH,
+        data=json.dumps(dict(body, stream=False)).encode("utf-8"),
+        headers={"Content-Type": "application/json", "Authorization": authorization or ""},
+    )
+    with urllib.request.urlopen(request, timeout=120) as response:
+        return json.loads(response.read())
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}
+
+    def count(self, name):
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counts)
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    cassette = None
+    stats = None
+    rng = random.Random()
+    rng_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def random(self):
+        with self.rng_lock:
+            return self.rng.random()
+
+    def send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_error_json(self, status, message, code, headers=None):
+        self.stats.count(f"status_{status}")
+        self.send_json(status, {"error": {"message": message, "type": "invalid_request_error", "code": code}}, headers)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            self.send_json(200, self.stats.snapshot())
+        else:
+            self.send_error_json(404, f"Unknown path {self.path}", "not_found")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length)
+        if self.path.rstrip("/") != COMPLETIONS_PATH:
+            self.send_error_json(404, f"Unknown path {self.path}", "not_found")
+            return
+        try:
+            body = json.loads(raw)
+        except ValueError as e:
+            self.send_error_json(400, f"Invalid JSON body: {e}", "invalid_json")
+            return
+        self.stats.count("requests")
+
+        tokens = prompt_tokens(body)
+        if standin_settings["max_request_tokens"] and tokens > standin_settings["max_request_tokens"]:
+            self.send_error_json(413, f"Request too large: {tokens} tokens", "request_too_large")
+            return
+        if self.random() < standin_settings["rate_413"]:
+            self.send_error_json(413, "Request too large (injected)", "request_too_large")
+            return
+        if self.random() < standin_settings["rate_429"]:
+            retry_after = standin_settings["retry_after_s"]
+            self.send_error_json(
+                429, f"Rate limit reached, please try again in {retry_after}s (injected)", "rate_limit_exceeded",
+                {"retry-after": f"{retry_after:g}"},
+            )
+            return
+
+        response = self.lookup(body, tokens)
+        if response is None:
+            return
+        # Serve the response with the configured latency and throughput
+        content = response["choices"][0]["message"].get("content") or ""
+        delay = standin_settings["latency_ms"] + self.random() * standin_settings["jitter_ms"]
+        time.sleep(delay / 1000)
+        if body.get("stream"):
+            self.stream(response, content)
+        else:
+            time.sleep(estimate_tokens(content) / standin_settings["tokens_per_second"])
+            self.send_json(200, response)
+        self.stats.count("responses")
+
+    def lookup(self, body, tokens):
+        # Returns the response to serve, or None after answering with an error
+        mode = standin_settings["mode"]
+        key = request_key(body)
+        response = self.cassette.get(key) if mode != "synthetic" else None
+        if response is not None:
+            self.stats.count("cassette_hits")
+            return dict(response, id=f"chatcmpl-{uuid.uuid4().hex}", created=int(time.time()))
+        if mode == "record":
+            try:
+                response = forward(body, self.headers.get("Authorization"))
+            except urllib.error.HTTPError as e:
+                self.send_error_json(e.code, f"Upstream error: {e.read().decode('utf-8', 'replace')}", "upstream_error")
+                return None
+            except Exception as e:
+                self.send_error_json(502, f"Upstream error: {e}", "upstream_error")
+                return None
+            self.cassette.put(key, body, response)
+            self.cassette.save()
+            self.stats.count("recorded")
+            return response
+        if mode == "replay":
+            self.stats.count("cassette_misses")
+            if standin_settings["strict"]:
+                self.send_error_json(404, "No cassette entry for this request", "cassette_miss")
+                return None
+        return completion(body.get("model"), synthetic_content(body), tokens)
+
+    def stream(self, response, content):
+        # Server-sent events in the OpenAI chunk format, one token-sized piece
+        # at a time; the last chunk carries the usage like Groq's x_groq block
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        base = {"id": response["id"], "object": "chat.completion.chunk", "created": response["created"], "model": response["model"]}
+        message = response["choices"][0]["message"]
+
+        def send(delta, finish_reason=None, extra=None):
+            chunk = dict(base, choices=[{"index": 0, "delta": delta, "finish_reason": finish_reason}], **(extra or {}))
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        try:
+            send({"role": "assistant", "content": ""})
+            pieces = [content[i:i + 4] for i in range(0, len(content), 4)]
+            for piece in pieces:
+                time.sleep(1 / standin_settings["tokens_per_second"])
+                send({"content": piece})
+            if message.get("tool_calls"):
+                send({"tool_calls": [dict(call, index=i) for i, call in enumerate(message["tool_calls"])]})
+            send({}, response["choices"][0].get("finish_reason", "stop"), {"x_groq": {"usage": response.get("usage")}})
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client closed the stream early (ai_scoring --no-reasoning does)
+            self.stats.count("streams_closed_early")
+
+def build_cassette(input_paths, cassette):
+    # Every prompt variant ai_scoring sends for these inputs, answered with
+    # the local scorer's sub-scores in the layout that variant asks for
+    import ai_scoring
+    from local_scorer import local_scores
+    added = 0
+    for path in input_paths:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for item in data if isinstance(data, list) else [data]:
+            for stream, reasoning in ((False, True), (True, True), (True, False)):
+                application = ai_scoring.parse_application(dict(item, stream=stream, reasoning=reasoning))
+                prompt = ai_scoring.build_prompt(application["resume"], application["job_description"], stream, reasoning)
+                body = {"model": ai_scoring.SCORING_MODEL, "messages": [{"role": "user", "content": prompt}]}
+                scores = json.dumps(local_scores([application])[0], indent=2)
+                if not reasoning:
+                    content = scores
+                elif stream:
+                    content = f"{scores}\nRecorded from {os.path.basename(path)} with local scores."
+                else:
+                    content = f"Recorded from {os.path.basename(path)} with local scores.\n{scores}"
+                cassette.put(request_key(body), body, completion(body["model"], content, estimate_tokens(prompt)))
+                added += 1
+    cassette.save()
+    return added
+
+def main():
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Local stand-in for the Groq chat completions API")
+    parser.add_argument('command', choices=['serve', 'build-cassette'])
+    parser.add_argument('inputs', nargs='*', help='Scoring input JSON files for build-cassette')
+    parser.add_argument('--cassette', type=str, default=DEFAULT_CASSETTE, help='Cassette file')
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--mode', choices=['replay', 'record', 'synthetic'], default=standin_settings["mode"])
+    parser.add_argument('--strict', action='store_true', help='In replay mode, answer cassette misses with 404')
+    parser.add_argument('--latency-ms', type=float, default=standin_settings["latency_ms"], help='Delay before the first token')
+    parser.add_argument('--jitter-ms', type=float, default=standin_settings["jitter_ms"], help='Random extra delay, up to this much')
+    parser.add_argument('--tokens-per-second', type=float, default=standin_settings["tokens_per_second"], help='Completion token throughput')
+    parser.add_argument('--rate-429', type=float, default=standin_settings["rate_429"], help='Share of requests answered with 429')
+    parser.add_argument('--rate-413', type=float, default=standin_settings["rate_413"], help='Share of requests answered with 413')
+    parser.add_argument('--retry-after', type=float, default=standin_settings["retry_after_s"], help='retry-after seconds sent with 429s')
+    parser.add_argument('--max-request-tokens', type=int, default=standin_settings["max_request_tokens"], help='Answer larger requests with 413 (0: no limit)')
+    parser.add_argument('--seed', type=int, help='Seed for latency jitter and error injection')
+    args = parser.parse_args()
+
+    cassette = Cassette(args.cassette)
+    if args.command == "build-cassette":
+        inputs = args.inputs or [os.path.join(here, "sample_input.json"), os.path.join(here, "test_input.json")]
+        try:
+            added = build_cassette(inputs, cassette)
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"Wrote {added} entries to {args.cassette}", file=sys.stderr)
+        return
+
+    standin_settings.update(
+        mode=args.mode, strict=args.strict, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        tokens_per_second=max(1.0, args.tokens_per_second), rate_429=args.rate_429, rate_413=args.rate_413,
+        retry_after_s=args.retry_after, max_request_tokens=args.max_request_tokens,
+    )
+    StandinHandler.cassette = cassette
+    StandinHandler.stats = Stats()
+    StandinHandler.rng = random.Random(args.seed)
+    server = ThreadingHTTPServer((args.host, args.port), StandinHandler)
+    server.daemon_threads = True
+    print(f"Groq stand-in ({args.mode}, {len(cassette.entries)} cassette entries) on http://{args.host}:{args.port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
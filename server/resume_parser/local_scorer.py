@@ -0,0 +1,148 @@
+import re
+import numpy as np
+from prompt_compaction import content_words
+
+# Deterministic, LLM-free scoring of a whole batch of applications at once.
+# Produces the same four 0-10 sub-scores as the ATS prompt:
+#   SkillsScore              - share of the job description's keywords found in the resume
+#   ExperienceRelevanceScore - TF-IDF cosine similarity of resume and job description
+#   ExperienceYearsScore     - years in experience_dates against the years the job asks for
+#   EducationScore           - highest degree in the resume against the degree the job asks for
+# Used as the fallback when the LLM call fails and to shortlist which
+# applications are worth an LLM call at all.
+
+SCORE_NAMES = ("EducationScore", "SkillsScore", "ExperienceYearsScore", "ExperienceRelevanceScore")
+
+# Cosine similarity treated as a perfect match. A long resume against a short
+# job description rarely goes above it; on our uploads a strong match is ~0.1
+FULL_SIMILARITY = 0.15
+# Years that earn full marks when the job description doesn't state any
+DEFAULT_REQUIRED_YEARS = 5
+
+_YEARS_PATTERN = re.compile(r"(\d{1,2})\s*\+?\s*(?:-|to)?\s*(?:\d{1,2}\s*)?(?:years|yrs)", re.IGNORECASE)
+DEGREE_PATTERNS = [
+    (4, re.compile(r"\b(ph\.?\s?d|doctorate|doctor of)\b", re.IGNORECASE)),
+    (3, re.compile(r"\b(master'?s?|m\.?\s?sc?|m\.?\s?s\b|mba|m\.?\s?phil|m\.?\s?tech|m\.?\s?eng|ms\s?cs)\b", re.IGNORECASE)),
+    (2, re.compile(r"\b(bachelor'?s?|b\.?\s?sc?|b\.?\s?s\b|b\.?\s?e\b|b\.?\s?tech|bba|bscs|bs\s?cs|undergraduate|degree)\b", re.IGNORECASE)),
+    (1, re.compile(r"\b(diploma|associate|intermediate|f\.?\s?sc|a[\s-]?levels?|high school)\b", re.IGNORECASE)),
+]
+# EducationScore by degree level when the job asks for no particular degree
+UNSTATED_DEGREE_SCORES = np.array([3, 6, 8, 9, 10])
+
+def to_datetime64(dates):
+    # "YYYY-MM-DD" strings (or None) to datetime64[D]; unparseable values become NaT
+    values = []
+    for d in dates:
+        try:
+            values.append(np.datetime64(d, "D") if d else np.datetime64("NaT"))
+        except ValueError:
+            values.append(np.datetime64("NaT"))
+    return np.array(values, dtype="datetime64[D]")
+
+def degree_level(text):
+    for level, pattern in DEGREE_PATTERNS:
+        if pattern.search(text):
+            return level
+    return 0
+
+def required_years(job_description):
+    match = _YEARS_PATTERN.search(job_description)
+    return int(match.group(1)) if match and int(match.group(1)) > 0 else 0
+
+def experience_years(applications):
+    # Total years per application, summed over its experience_dates
+    owners, starts, ends = [], [], []
+    for i, application in enumerate(applications):
+        for start, end in application.get("experience_dates") or []:
+            owners.append(i)
+            starts.append(start)
+            ends.append(end)
+    if not owners:
+        return np.zeros(len(applications))
+    days = (to_datetime64(ends) - to_datetime64(starts)).astype("float64")
+    days = np.where(np.isnan(days) | (days < 0), 0, days)
+    return np.bincount(owners, weights=days, minlength=len(applications)) / 365.25
+
+def term_counts(resumes, job_descriptions):
+    # Term count matrices over one shared vocabulary: one row per resume and
+    # one per distinct job description, plus each application's JD row
+    jd_index = {}
+    for jd in job_descriptions:
+        jd_index.setdefault(jd, len(jd_index))
+    docs = [content_words(text) for text in list(resumes) + list(jd_index)]
+    vocabulary = {}
+    for words in docs:
+        for word in words:
+            vocabulary.setdefault(word, len(vocabulary))
+    counts = np.zeros((len(docs), max(1, len(vocabulary))), dtype=np.float32)
+    for row, words in enumerate(docs):
+        np.add.at(counts[row], [vocabulary[word] for word in words], 1)
+    jd_rows = np.array([jd_index[jd] for jd in job_descriptions])
+    return counts[:len(resumes)], counts[len(resumes):], jd_rows
+
+def tfidf_similarity(resume_counts, jd_counts, jd_rows):
+    # Cosine similarity of each resume with its job description, with the
+    # IDF taken over the batch
+    counts = np.vstack([resume_counts, jd_counts])
+    df = (counts > 0).sum(axis=0)
+    idf = np.log((1 + len(counts)) / (1 + df)) + 1
+    weights = np.log1p(counts) * idf
+    norms = np.linalg.norm(weights, axis=1, keepdims=True)
+    weights /= np.where(norms == 0, 1, norms)
+    resume_vectors, jd_vectors = weights[:len(resume_counts)], weights[len(resume_counts):][jd_rows]
+    return np.einsum("ij,ij->i", resume_vectors, jd_vectors)
+
+def keyword_overlap(resume_counts, jd_counts, jd_rows):
+    # Share of each job description's distinct keywords present in its resume
+    keywords = jd_counts[jd_rows] > 0
+    found = (keywords & (resume_counts > 0)).sum(axis=1)
+    total = keywords.sum(axis=1)
+    return np.divide(found, total, out=np.zeros(len(total)), where=total > 0)
+
+def score_matrix(applications):
+    # Returns an (n, 4) int array of sub-scores in SCORE_NAMES order
+    if not applications:
+        return np.zeros((0, len(SCORE_NAMES)), dtype=int)
+    resumes = [application["resume"] for application in applications]
+    job_descriptions = [application["job_description"] for application in applications]
+
+    resume_levels = np.array([degree_level(resume) for resume in resumes])
+    required_levels = np.array([degree_level(jd) for jd in job_descriptions])
+    education = np.where(
+        required_levels == 0,
+        UNSTATED_DEGREE_SCORES[resume_levels],
+        np.clip(10 - 3 * (required_levels - resume_levels), 0, 10),
+    )
+
+    resume_counts, jd_counts, jd_rows = term_counts(resumes, job_descriptions)
+    # Job descriptions carry filler words too; two thirds of them is full marks
+    skills = 10 * np.clip(keyword_overlap(resume_counts, jd_counts, jd_rows) * 1.5, 0, 1)
+
+    required = np.array([required_years(jd) for jd in job_descriptions], dtype=float)
+    required = np.where(required == 0, DEFAULT_REQUIRED_YEARS, required)
+    years = 10 * np.clip(experience_years(applications) / required, 0, 1)
+
+    relevance = 10 * np.clip(tfidf_similarity(resume_counts, jd_counts, jd_rows) / FULL_SIMILARITY, 0, 1)
+
+    return np.rint(np.column_stack([education, skills, years, relevance])).astype(int)
+
+def weighted_scores(scores, weights):
+    # scores: (n, 4) array; weights: one dict per row. Same scale as
+    # WeightedScore (0-100).
+    weight_matrix = np.array([[w.get(name, 0) for name in SCORE_NAMES] for w in weights], dtype=float)
+    return np.rint((scores * weight_matrix).sum(axis=1) * 10).astype(int)
+
+def local_scores(applications):
+    # One {"EducationScore": ..., ...} dict per application
+    return [dict(zip(SCORE_NAMES, map(int, row))) for row in score_matrix(applications)]
+
+def shortlist(job_descriptions, totals, top_n):
+    # Row indices of the top_n weighted totals per job description; ties
+    # keep the original order
+    groups = {}
+    for i, jd in enumerate(job_descriptions):
+        groups.setdefault(jd, []).append(i)
+    keep = set()
+    for indices in groups.values():
+        keep.update(sorted(indices, key=lambda i: (-totals[i], i))[:top_n])
+    return keep
@@ -0,0 +1,141 @@
+import sys
+import re
+import shutil
+import subprocess
+from contextlib import nullcontext
+import pdfplumber
+from pypdf import PdfReader
+from extraction_budget import DeadlineExceeded
+
+# Interchangeable PDF text-layer engines, cheapest first:
+#   fast       - poppler's pdftotext -raw (already installed for pdf2image), no layout analysis
+#   pypdf      - pure-Python content stream extraction
+#   pdfplumber - pdfminer char-level layout model; slowest, most robust
+# Every engine takes (file_path, page_numbers=None, budget=None) and returns
+# {page_number: text}, with None for pages the engine failed on; pages it had
+# no time for before the budget's deadline are left out. In "auto" mode pages
+# are escalated to the next engine only when the cheaper one produced garbage
+# or failed.
+
+def fast_pages(file_path, page_numbers=None, budget=None):
+    args = ["pdftotext", "-raw", "-enc", "UTF-8"]
+    first = 1
+    if page_numbers:
+        first = min(page_numbers)
+        args += ["-f", str(first), "-l", str(max(page_numbers))]
+    timeout = budget.remaining() if budget and budget.deadline is not None else 60
+    output = subprocess.run(args + [file_path, "-"], capture_output=True, check=True, timeout=timeout).stdout
+    # pdftotext ends every page with a form feed
+    pages = output.decode("utf-8", errors="replace").split("\f")[:-1]
+    texts = {first + i: text for i, text in enumerate(pages)}
+    if page_numbers:
+        texts = {n: texts.get(n) for n in page_numbers}
+    return texts
+
+def pypdf_pages(file_path, page_numbers=None, budget=None):
+    texts = {}
+    try:
+        reader = PdfReader(file_path)
+        for n in page_numbers or range(1, len(reader.pages) + 1):
+            if budget and budget.expired():
+                break
+            try:
+                texts[n] = reader.pages[n - 1].extract_text() or ""
+            except Exception as e:
+                print(f"pypdf failed on page {n}: {e}", file=sys.stderr)
+                texts[n] = None
+    except DeadlineExceeded:
+        budget.truncate("deadline")
+    return texts
+
+def pdfplumber_pages(file_path, page_numbers=None, budget=None):
+    texts = {}
+    try:
+        with pdfplumber.open(file_path, pages=page_numbers) as pdf:
+            for page in pdf.pages:
+                if budget and budget.expired():
+                    break
+                try:
+                    texts[page.page_number] = page.extract_text() or ""
+                except Exception as e:
+                    print(f"pdfplumber failed on page {page.page_number}: {e}", file=sys.stderr)
+                    texts[page.page_number] = None
+    except DeadlineExceeded:
+        budget.truncate("deadline")
+    return texts
+
+def page_count(file_path):
+    # Reads only the page tree, not the content streams
+    return len(PdfReader(file_path).pages)
+
+ENGINES = {
+    "fast": fast_pages,
+    "pypdf": pypdf_pages,
+    "pdfplumber": pdfplumber_pages,
+}
+ENGINE_CHOICES = ["auto"] + list(ENGINES)
+
+def engine_chain(engine):
+    if engine != "auto":
+        return [engine]
+    chain = list(ENGINES)
+    if shutil.which("pdftotext") is None:
+        chain.remove("fast")
+    return chain
+
+_CID_PATTERN = re.compile(r"\(cid:\d+\)")
+_READABLE_PATTERN = re.compile(r"[\w\s.,;:!?'\"()\[\]{}@#%&*+\-/\\|<>=$€£•·–—’‘“”]", re.UNICODE)
+
+def is_garbage(text):
+    # Cheap checks for broken text layers: unmapped glyphs, undecodable bytes,
+    # letter-spaced output ("J o h n") or words run together with no spaces.
+    stripped = text.strip()
+    if not stripped:
+        return False
+    if _CID_PATTERN.search(stripped) or stripped.count("�") > len(stripped) * 0.01:
+        return True
+    if len(_READABLE_PATTERN.findall(stripped)) < len(stripped) * 0.85:
+        return True
+    words = stripped.split()
+    if len(words) >= 20:
+        single_chars = sum(1 for w in words if len(w) == 1)
+        if single_chars > len(words) * 0.5:
+            return True
+        if len(stripped) / len(words) > 25:
+            return True
+    return False
+
+def extract_pages(file_path, engine="auto", page_numbers=None, budget=None):
+    # Returns (page texts in order, engine used per page). Pages every engine
+    # failed on come back as "" with engine None, so the caller can OCR them.
+    texts, used = None, {}
+    pending = page_numbers
+    last_error = None
+    for name in engine_chain(engine):
+        if budget and budget.expired():
+            break
+        try:
+            with budget.alarm() if budget else nullcontext():
+                result = ENGINES[name](file_path, pending, budget)
+        except DeadlineExceeded:
+            budget.truncate("deadline")
+            break
+        except Exception as e:
+            print(f"{name} could not read {file_path}: {e}", file=sys.stderr)
+            last_error = e
+            continue
+        if texts is None:
+            texts = {n: "" for n in result}
+        for n, text in result.items():
+            if text is not None:
+                texts[n] = text
+                used[n] = name
+        pending = [n for n in sorted(texts) if n not in used or is_garbage(texts[n])]
+        if not pending:
+            break
+    if texts is None:
+        if budget and budget.truncated:
+            return [], []
+        raise last_error or ValueError(f"Unknown PDF engine: {engine}")
+    page_numbers = sorted(texts)
+    return [texts[n] for n in page_numbers], [used.get(n) for n in page_numbers]
@@ -0,0 +1,115 @@
+import re
+import math
+from resume_sections import heading_name
+
+# Shrinks the resume and job description so a scoring prompt fits a token
+# budget. Lines are cleaned and de-duplicated first (repeated page headers,
+# footers, blank runs); if that is not enough, the resume keeps its most
+# job-relevant lines and sentences, ranked by word overlap with the job
+# description, in their original order. Section headings are always kept.
+# Tokens are estimated locally; the estimate is additive over lines, so the
+# returned text is guaranteed to fit the budget by that estimate.
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+_WORD_PATTERN = re.compile(r"[a-z0-9+#.]*[a-z0-9+#]")
+_SENTENCE_PATTERN = re.compile(r"(?<=[.!?;])\s+")
+MAX_UNIT_TOKENS = 80  # longer lines (a PDF with no line breaks) are split up
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in into is it its of on or our that the this to was were will with
+we you your they their he she his her i me my not but if than then so such can may must should would
+""".split())
+
+def estimate_tokens(text):
+    # Roughly one token per short word or punctuation mark, one per ~4
+    # characters of longer words; close to the llama3 tokenizer for English
+    return sum(max(1, math.ceil(len(piece) / 4)) for piece in _TOKEN_PATTERN.findall(text))
+
+def clean_lines(text):
+    # Collapses whitespace and drops empty and repeated lines
+    lines, seen = [], set()
+    for line in text.splitlines():
+        line = " ".join(line.split())
+        key = line.lower()
+        if not line or key in seen:
+            continue
+        seen.add(key)
+        lines.append(line)
+    return lines
+
+def split_units(lines):
+    units = []
+    for line in lines:
+        if estimate_tokens(line) <= MAX_UNIT_TOKENS:
+            units.append(line)
+            continue
+        for sentence in _SENTENCE_PATTERN.split(line):
+            words, chunk = sentence.split(), []
+            for word in words:
+                chunk.append(word)
+                if estimate_tokens(" ".join(chunk)) >= MAX_UNIT_TOKENS:
+                    units.append(" ".join(chunk))
+                    chunk = []
+            if chunk:
+                units.append(" ".join(chunk))
+    return units
+
+def content_words(text):
+    return [word for word in _WORD_PATTERN.findall(text.lower()) if word not in STOPWORDS and len(word) > 1]
+
+def take_tokens(units, budget):
+    # Leading units that fit in budget
+    kept, used = [], 0
+    for unit in units:
+        tokens = estimate_tokens(unit)
+        if used + tokens > budget:
+            break
+        kept.append(unit)
+        used += tokens
+    return kept
+
+def select_relevant(units, query, budget):
+    # Greedy by relevance to query, returned in document order
+    weights = {}
+    for term in content_words(query):
+        weights[term] = weights.get(term, 0) + 1
+    weights = {term: 1 + math.log(count) for term, count in weights.items()}
+
+    def relevance(unit):
+        if heading_name(unit):
+            return math.inf
+        terms = set(content_words(unit))
+        return sum(weights.get(term, 0) for term in terms) / math.sqrt(len(terms) + 1)
+
+    ranked = sorted(range(len(units)), key=lambda i: (-relevance(units[i]), i))
+    kept, used = set(), 0
+    for i in ranked:
+        tokens = estimate_tokens(units[i])
+        if used + tokens <= budget:
+            kept.add(i)
+            used += tokens
+    return [units[i] for i in sorted(kept)]
+
+def compact_for_prompt(resume_text, job_description, max_tokens, overhead_tokens=0):
+    # Returns (resume_text, job_description, report) where
+    # overhead_tokens + tokens(resume_text) + tokens(job_description) <= max_tokens
+    # whenever the overhead itself fits. report has tokens before/after.
+    before = overhead_tokens + estimate_tokens(resume_text) + estimate_tokens(job_description)
+    available = max(0, max_tokens - overhead_tokens)
+    resume_units = split_units(clean_lines(resume_text))
+    jd_units = split_units(clean_lines(job_description))
+    resume_tokens = sum(estimate_tokens(unit) for unit in resume_units)
+    jd_tokens = sum(estimate_tokens(unit) for unit in jd_units)
+
+    if resume_tokens + jd_tokens > available:
+        # The job description may use half the room, or more if the resume
+        # doesn't need it; the requirements usually come first, so keep its start
+        kept_jd = take_tokens(jd_units, max(available // 2, available - resume_tokens))
+        jd_tokens = sum(estimate_tokens(unit) for unit in kept_jd)
+        resume_units = select_relevant(resume_units, job_description, available - jd_tokens)
+        jd_units = kept_jd
+
+    resume_text = "\n".join(resume_units)
+    job_description = "\n".join(jd_units)
+    after = overhead_tokens + estimate_tokens(resume_text) + estimate_tokens(job_description)
+    return resume_text, job_description, {"before": before, "after": after, "budget": max_tokens}
@@ -0,0 +1,51 @@
+import time
+import asyncio
+
+# Token bucket for provider rate limits (requests and tokens per minute).
+# Both buckets start full and refill continuously; acquire() waits until one
+# request and the estimated tokens fit. pause() is for 429 responses: every
+# waiting caller holds off until the provider's retry-after has passed.
+
+class TokenBucket:
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.capacity = {"requests": float(requests_per_minute), "tokens": float(tokens_per_minute)}
+        self.level = dict(self.capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.waits = 0
+        self.lock = asyncio.Lock()
+
+    def _refill(self, now):
+        elapsed = max(0.0, now - self.updated)
+        self.updated = now
+        for key, capacity in self.capacity.items():
+            self.level[key] = min(capacity, self.level[key] + capacity * elapsed / 60)
+
+    async def acquire(self, tokens):
+        # A request larger than a minute's budget can never fit; let it through
+        # once the bucket is full rather than waiting forever
+        tokens = min(tokens, self.capacity["tokens"])
+        # The lock queues callers in arrival order
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self._refill(now)
+                if self.level["requests"] >= 1 and self.level["tokens"] >= tokens:
+                    self.level["requests"] -= 1
+                    self.level["tokens"] -= tokens
+                    return
+                self.waits += 1
+                await asyncio.sleep(max(
+                    (1 - self.level["requests"]) * 60 / self.capacity["requests"],
+                    (tokens - self.level["tokens"]) * 60 / self.capacity["tokens"],
+                ))
+
+    def pause(self, seconds):
+        # Empty the buckets too, so callers resume at the steady rate instead
+        # of bursting straight back into the limit
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.level = {key: 0.0 for key in self.level}
+        self.updated = self.paused_until
@@ -0,0 +1,100 @@
+import re
+from datetime import date
+import numpy as np
+from local_scorer import to_datetime64
+
+# Red flags for a whole applicant pool at once, with the same rules as
+# ai_scoring.detect_red_flag:
+#   - two or more roles shorter than 12 calendar months
+#   - a gap of more than 6 calendar months between consecutive roles (by
+#     start date) that no education interval overlaps
+#   - more than 6 calendar months since the most recent role ended
+# Intervals are columnar: one row per interval with an owner (candidate
+# index), start and end as datetime64[D]. Gap coverage is a sorted search
+# against a per-candidate running maximum of education end dates, so it is
+# O((roles + educations) log educations) instead of gaps x educations.
+
+FLAG_NAMES = (
+    "Frequent Job Switching (<1 year roles)",
+    "Work Gap > 6 Months",
+    "Unemployed > 6 Months (Currently)",
+)
+_DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+def months(dates):
+    # year * 12 + month, as a difference-safe integer
+    return dates.astype("datetime64[M]").astype(np.int64)
+
+def to_columns(interval_lists):
+    # [[(start, end), ...] per candidate] -> (owner, start, end, valid), where
+    # valid[i] is False if any of candidate i's dates is not a YYYY-MM-DD date
+    owners, starts, ends = [], [], []
+    for i, intervals in enumerate(interval_lists):
+        for start, end in intervals or []:
+            owners.append(i)
+            starts.append(start)
+            ends.append(end)
+    start, end = to_datetime64(starts), to_datetime64(ends)
+    owner = np.array(owners, dtype=np.int64)
+    well_formed = np.array(
+        [isinstance(d, str) and _DATE_PATTERN.fullmatch(d) is not None for d in starts + ends], dtype=bool
+    ).reshape(2, -1).all(axis=0) if owners else np.zeros(0, dtype=bool)
+    ok = well_formed & ~np.isnat(start) & ~np.isnat(end)
+    valid = np.bincount(owner[~ok], minlength=len(interval_lists)) == 0
+    return owner, start, end, valid
+
+def red_flag_matrix(n, exp_owner, exp_start, exp_end, edu_owner, edu_start, edu_end, today):
+    # Returns an (n, 3) bool array, columns in FLAG_NAMES order
+    flags = np.zeros((n, len(FLAG_NAMES)), dtype=bool)
+    if len(exp_owner) == 0:
+        return flags
+
+    # Roles ordered by start within each candidate; lexsort is stable, so ties
+    # keep their input order as sorted() does
+    order = np.lexsort((exp_start, exp_owner))
+    owner, start, end = exp_owner[order], exp_start[order], exp_end[order]
+
+    short = (months(end) - months(start)) < 12
+    flags[:, 0] = np.bincount(owner[short], minlength=n) >= 2
+
+    # Consecutive roles of the same candidate
+    same = owner[1:] == owner[:-1]
+    gap_owner, prev_end, curr_start = owner[1:][same], end[:-1][same], start[1:][same]
+    long_gap = (months(curr_start) - months(prev_end)) > 6
+    gap_owner, prev_end, curr_start = gap_owner[long_gap], prev_end[long_gap], curr_start[long_gap]
+    covered = np.zeros(len(gap_owner), dtype=bool)
+    if len(gap_owner) and len(edu_owner):
+        # Composite (owner, day) keys sort candidates apart; a gap is covered
+        # by an education that started before the gap ends and ended after it
+        # began, i.e. the latest end among educations starting before
+        # curr_start is after prev_end
+        days = [d.astype(np.int64) for d in (edu_start, edu_end, prev_end, curr_start)]
+        low = min(d.min() for d in days)
+        span = max(d.max() for d in days) - low + 2
+        edu_order = np.lexsort((days[0], edu_owner))
+        e_owner = edu_owner[edu_order]
+        start_keys = e_owner * span + (days[0][edu_order] - low)
+        latest_end = np.maximum.accumulate(e_owner * span + (days[1][edu_order] - low)) - e_owner * span
+        index = np.searchsorted(start_keys, gap_owner * span + (days[3] - low), side="left") - 1
+        found = (index >= 0) & (e_owner[np.maximum(index, 0)] == gap_owner)
+        covered = found & (latest_end[np.maximum(index, 0)] + low > days[2])
+    flags[:, 1] = np.bincount(gap_owner[~covered], minlength=n) > 0
+
+    last = np.append(owner[1:] != owner[:-1], True)
+    unemployed = (months(np.datetime64(today, "D")) - months(end[last])) > 6
+    flags[owner[last][unemployed], 2] = True
+    return flags
+
+def detect_red_flags(applications, today=None):
+    # One detect_red_flag-style string per application, or None for any
+    # application with malformed dates (callers fall back to the scalar
+    # function, which reports the parse error)
+    today = today or date.today()
+    exp_owner, exp_start, exp_end, exp_valid = to_columns([a.get("experience_dates") for a in applications])
+    edu_owner, edu_start, edu_end, edu_valid = to_columns([a.get("education_dates") for a in applications])
+    flags = red_flag_matrix(len(applications), exp_owner, exp_start, exp_end, edu_owner, edu_start, edu_end, today)
+    results = []
+    for row, valid in zip(flags, exp_valid & edu_valid):
+        names = [name for name, raised in zip(FLAG_NAMES, row) if raised]
+        results.append((", ".join(names) if names else "None") if valid else None)
+    return results
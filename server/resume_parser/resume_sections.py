@@ -0,0 +1,84 @@
+import re
+
+# Splits extracted resume text into sections by their headings.
+#
+# segment_sections(text) returns a list covering the whole text in order:
+#   [{"name": "header", "heading": None, "start": 0, "end": 85},
+#    {"name": "experience", "heading": "WORK EXPERIENCE", "start": 85, "end": 912}, ...]
+# start/end are character offsets into text (end exclusive) and each section
+# includes its heading line. "header" is whatever precedes the first heading,
+# usually the name and contact block; lines that look like headings but are
+# not recognised stay inside the current section.
+
+SECTION_ALIASES = {
+    "summary": [
+        "summary", "professional summary", "career summary", "profile", "professional profile",
+        "objective", "career objective", "about me", "personal statement",
+    ],
+    "experience": [
+        "experience", "work experience", "professional experience", "relevant experience",
+        "employment", "employment history", "work history", "career history",
+        "internship", "internships", "internship experience",
+    ],
+    "education": [
+        "education", "academic background", "educational background", "academics",
+        "qualifications", "academic qualifications", "education and training",
+    ],
+    "skills": [
+        "skills", "technical skills", "core skills", "key skills", "skill set", "skills and tools",
+        "soft skills", "core competencies", "competencies", "technologies", "tools and technologies",
+        "expertise", "areas of expertise",
+    ],
+    "projects": [
+        "projects", "personal projects", "academic projects", "key projects", "selected projects",
+        "final year project", "fyp",
+    ],
+    "certifications": [
+        "certifications", "certificates", "certification", "licenses and certifications",
+        "courses", "training", "trainings",
+    ],
+    "awards": ["awards", "achievements", "honors", "honours", "accomplishments", "awards and achievements"],
+    "publications": ["publications", "research", "research papers"],
+    "languages": ["languages"],
+    "interests": ["interests", "hobbies", "hobbies and interests"],
+    "volunteering": ["volunteering", "volunteer experience", "extracurricular activities", "activities"],
+    "references": ["references", "referees"],
+    "contact": ["contact", "contact information", "contact details", "personal information", "personal details"],
+}
+
+# Sections worth sending to the scoring model
+SCORING_SECTIONS = ("summary", "experience", "education", "skills", "projects")
+
+_HEADINGS = {alias: name for name, aliases in SECTION_ALIASES.items() for alias in aliases}
+_LINE_PATTERN = re.compile(r"[^\n]*\n?")
+_NOISE_PATTERN = re.compile(r"[^a-z ]+")
+MAX_HEADING_LENGTH = 40
+
+def heading_name(line):
+    # Returns the section a heading line starts, or None
+    line = line.strip()
+    if not line or len(line) > MAX_HEADING_LENGTH or line.endswith("."):
+        return None  # too long or a sentence, not a heading
+    normalized = _NOISE_PATTERN.sub(" ", line.lower().replace("&", " and "))
+    return _HEADINGS.get(" ".join(normalized.split()))
+
+def segment_sections(text):
+    sections = [{"name": "header", "heading": None, "start": 0, "end": len(text)}]
+    for match in _LINE_PATTERN.finditer(text):
+        name = heading_name(match.group())
+        if name is None:
+            continue
+        start = match.start()
+        sections[-1]["end"] = start
+        sections.append({"name": name, "heading": match.group().strip(), "start": start, "end": len(text)})
+    return [s for s in sections if s["end"] > s["start"]]
+
+def select_sections(text, sections, names=SCORING_SECTIONS):
+    # Joins the named sections in document order. Falls back to the full text
+    # when none were found (or the offsets don't belong to this text), so an
+    # unusual layout is never scored on less than its whole resume.
+    if not sections or max(s["end"] for s in sections) > len(text):
+        return text
+    parts = [text[s["start"]:s["end"]].strip() for s in sections if s["name"] in names]
+    parts = [part for part in parts if part]
+    return "\n\n".join(parts) if parts else text
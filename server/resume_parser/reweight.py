@@ -0,0 +1,70 @@
+import sys
+import json
+import argparse
+import numpy as np
+from local_scorer import SCORE_NAMES
+
+# Recomputes WeightedScore and rankings from stored sub-scores when a job's
+# weights change, without calling the LLM: the sub-scores of every
+# application form an (n, 4) matrix and the new totals are one
+# matrix-vector product with the weight vector.
+#
+# Usage: python reweight.py [--input input.json]   (JSON on stdin otherwise)
+# Input:  {"weights": {"EducationScore": 0.4, ...},
+#          "applications": [{"id": 1, "Scores": {"EducationScore": 8, ...}}, ...]}
+# Output: {"results": [{"id": 1, "WeightedScore": 72, "Rank": 1}, ...]} in input
+# order. Rank 1 is the best; ties keep input order. Applications missing a
+# sub-score get WeightedScore and Rank null.
+
+def weight_vector(weights):
+    return np.array([float(weights.get(name) or 0) for name in SCORE_NAMES])
+
+def score_value(value):
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+def score_rows(score_dicts):
+    # (n, 4) float matrix in SCORE_NAMES order, NaN where a sub-score is missing
+    # (None becomes NaN in a float array)
+    rows = [[score_value((scores or {}).get(name)) for name in SCORE_NAMES] for scores in score_dicts]
+    return np.array(rows, dtype=float).reshape(len(rows), len(SCORE_NAMES))
+
+def reweight(matrix, weights):
+    # Returns (totals, ranks): totals on the WeightedScore scale (0-100),
+    # NaN for incomplete rows; ranks 1..n by total, 0 for incomplete rows
+    # Summed left to right like build_result, so unchanged weights reproduce
+    # the stored scores exactly (a BLAS dot can differ in the last bit, which
+    # flips scores sitting on a .5)
+    totals = np.rint((matrix * weights).sum(axis=1) * 10)
+    valid = ~np.isnan(totals)
+    order = np.argsort(np.where(valid, -totals, np.inf), kind="stable")
+    ranks = np.empty(len(totals), dtype=np.int64)
+    ranks[order] = np.arange(1, len(totals) + 1)
+    ranks[~valid] = 0
+    return totals, ranks
+
+def reweight_applications(applications, weights):
+    totals, ranks = reweight(score_rows([a.get("Scores") for a in applications]), weight_vector(weights))
+    return [
+        {"id": a.get("id", i), "WeightedScore": int(total), "Rank": int(rank)} if rank else
+        {"id": a.get("id", i), "WeightedScore": None, "Rank": None}
+        for i, (a, total, rank) in enumerate(zip(applications, totals, ranks))
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-weight stored sub-scores without re-scoring")
+    parser.add_argument('--input', type=str, help='Path to input JSON file. If not provided, reads from stdin.')
+    args = parser.parse_args()
+    try:
+        if args.input:
+            with open(args.input, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        else:
+            data = json.load(sys.stdin)
+        results = reweight_applications(data.get("applications") or [], data.get("weights") or {})
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps({"results": results}))
+
+if __name__ == "__main__":
+    main()
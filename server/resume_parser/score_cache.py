@@ -0,0 +1,103 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+from extraction_cache import DEFAULT_CACHE_DIR
+
+# On-disk cache of raw LLM scoring responses, keyed by a hash of the
+# whitespace-normalized resume text and job description plus the model,
+# temperature and prompt version that produced them. Weights and red flags
+# are applied after the lookup, so re-weighting or re-running scoring for an
+# unchanged job is answered without calling the API. Entries expire after a
+# TTL and the least recently used are evicted beyond max_entries.
+
+DEFAULT_SCORE_CACHE_DIR = os.environ.get("RESUME_SCORE_CACHE_DIR", DEFAULT_CACHE_DIR)
+DEFAULT_MAX_ENTRIES = int(os.environ.get("RESUME_SCORE_CACHE_MAX_ENTRIES", "50000"))
+DEFAULT_TTL_S = float(os.environ.get("RESUME_SCORE_CACHE_TTL_HOURS", "720")) * 3600
+
+def normalize_text(text):
+    return " ".join(text.split())
+
+def make_score_key(resume_text, job_description, model, temperature, prompt_version):
+    payload = json.dumps(
+        [normalize_text(resume_text), normalize_text(job_description), model, temperature, prompt_version],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ScoreCache:
+    def __init__(self, cache_dir=DEFAULT_SCORE_CACHE_DIR, max_entries=DEFAULT_MAX_ENTRIES, ttl_s=DEFAULT_TTL_S):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.conn = sqlite3.connect(os.path.join(cache_dir, "score_cache.sqlite3"), timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, response TEXT NOT NULL, created REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries(last_access)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self.conn.commit()
+
+    def _count(self, name, amount=1):
+        self.conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + ?",
+            (name, amount, amount),
+        )
+
+    def get(self, key):
+        now = time.time()
+        with self.conn:
+            row = self.conn.execute("SELECT response, created FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl_s:
+                self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._count("expired")
+                row = None
+            if row is None:
+                self._count("misses")
+                return None
+            self.conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+            self._count("hits")
+            return row[0]
+
+    def put(self, key, response):
+        now = time.time()
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries (key, response, created, last_access) VALUES (?, ?, ?, ?)",
+                (key, response, now, now),
+            )
+            self._evict()
+
+    def _evict(self):
+        excess = self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0] - self.max_entries
+        if excess <= 0:
+            return
+        # Drop the least recently used entries
+        self.conn.execute(
+            "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY last_access LIMIT ?)",
+            (excess,),
+        )
+        self._count("evictions", excess)
+
+    def stats(self):
+        counters = dict(self.conn.execute("SELECT name, value FROM counters").fetchall())
+        entries = self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_hours": round(self.ttl_s / 3600, 2),
+            "hits": hits,
+            "misses": misses,
+            "expired": counters.get("expired", 0),
+            "evictions": counters.get("evictions", 0),
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+        }
+
+    def clear(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM entries")
+            self.conn.execute("DELETE FROM counters")
@@ -0,0 +1,41 @@
+import json
+import hashlib
+from score_cache import normalize_text
+
+# Fingerprints of the inputs a stored score was computed from, so an
+# incremental rescoring run (ai_scoring.py --batch --incremental) can skip
+# applications whose resume, job description, dates, weights and scoring
+# setup are all unchanged. Each input is hashed separately (texts are
+# whitespace-normalized, like the score cache key), which also says what
+# changed when one is rescored. LLM-scored results carry the fingerprint as
+# "Inputs"; the caller stores it with the score and sends it back as
+# "previous_inputs". A re-weight (reweight.py) only changes the weights, so it
+# hands back the stored fingerprint with just "weights" updated.
+
+INPUT_NAMES = ("resume", "job", "dates", "weights", "scoring")
+
+def digest(value):
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+def json_digest(value):
+    return digest(json.dumps(value, sort_keys=True, ensure_ascii=False))
+
+def weights_digest(weights):
+    return json_digest(weights or {})
+
+def input_fingerprint(data, scoring_setup):
+    # scoring_setup: whatever else decides the LLM answer (model,
+    # temperature, prompt version)
+    return {
+        "resume": digest(normalize_text(data.get("resume") or "")),
+        "job": digest(normalize_text(data.get("job_description") or "")),
+        "dates": json_digest([data.get("experience_dates") or [], data.get("education_dates") or []]),
+        "weights": weights_digest(data.get("weights")),
+        "scoring": json_digest(scoring_setup),
+    }
+
+def changed_inputs(current, previous):
+    # Names of the inputs that differ; all of them when nothing was recorded
+    if not isinstance(previous, dict):
+        return list(INPUT_NAMES)
+    return [name for name in INPUT_NAMES if current.get(name) != previous.get(name)]
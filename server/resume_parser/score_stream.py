@@ -0,0 +1,62 @@
+import json
+
+# Incremental parser for the scores object in a model response. Text is fed
+# in as it streams; the parser tracks brace depth (ignoring braces inside JSON
+# strings) from the first "{" and returns the object as soon as a complete one
+# containing every required key has arrived, so the caller can stop reading.
+# Objects missing the keys (a "{...}" in prose) are skipped.
+
+class ScoreObjectParser:
+    def __init__(self, required_keys):
+        self.required_keys = tuple(required_keys)
+        self.text = ""
+        self.result = None
+        self.span = None  # (start, end) of the scores object in self.text
+        self._pos = 0
+        self._start = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk):
+        self.text += chunk
+        text = self.text
+        while self.result is None and self._pos < len(text):
+            ch = text[self._pos]
+            if self._start is None:
+                if ch == "{":
+                    self._start, self._depth = self._pos, 1
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._close_object(self._pos + 1)
+            self._pos += 1
+        return self.result
+
+    def _close_object(self, end):
+        try:
+            candidate = json.loads(self.text[self._start:end])
+        except ValueError:
+            candidate = None
+        if isinstance(candidate, dict) and all(key in candidate for key in self.required_keys):
+            self.result = candidate
+            self.span = (self._start, end)
+        else:
+            self._start = None
+
+def find_score_object(text, required_keys):
+    # Returns (object, (start, end)) for the first complete scores object, or (None, None)
+    parser = ScoreObjectParser(required_keys)
+    parser.feed(text)
+    return parser.result, parser.span
@@ -0,0 +1,350 @@
+import os
+import sys
+import json
+import zlib
+import hashlib
+import argparse
+from contextlib import contextmanager
+import numpy as np
+from extraction_cache import DEFAULT_CACHE_DIR
+from prompt_compaction import content_words
+try:
+    import fcntl
+except ImportError:  # Windows: no locking, run one writer at a time
+    fcntl = None
+
+# Local candidate <-> job similarity index, for top-k ranking without an LLM
+# call. Each resume (candidates.resume_text) and job (title, required skills
+# and description) is a hashed term-frequency vector: content words are
+# hashed into a fixed number of buckets with crc32, so no vocabulary is kept
+# and nothing needs the network. Vectors live in one memory-mapped float32
+# matrix per kind; document frequencies are kept per bucket, and IDF
+# weighting and cosine similarity are applied at query time, so adding or
+# changing one document only rewrites its row.
+#
+# Usage:
+#   python similarity_index.py sync                  (index every resume and job in DATABASE_URL)
+#   python similarity_index.py update < items.json   ([{"kind": "jobs", "id": 3, "text": "..."}, ...];
+#                                                     empty text removes the entry)
+#   python similarity_index.py query < queries.json  ([{"from": "jobs", "id": 3, "k": 10}, ...] or
+#                                                     [{"to": "jobs", "text": "...", "k": 10}, ...];
+#                                                     optional "among": [ids] limits the candidates)
+#   python similarity_index.py stats
+#   python similarity_index.py serve                 (resident: one JSON request per line, see serve())
+#
+# update and query write one JSON line per item. Writers take an exclusive
+# lock on the index directory; queries take a shared one.
+
+DEFAULT_INDEX_DIR = os.environ.get("RESUME_SIMILARITY_INDEX_DIR", os.path.join(DEFAULT_CACHE_DIR, "similarity_index"))
+DEFAULT_DIMENSIONS = int(os.environ.get("RESUME_SIMILARITY_DIMENSIONS", "4096"))
+KINDS = ("candidates", "jobs")
+OTHER_KIND = {"candidates": "jobs", "jobs": "candidates"}
+INITIAL_ROWS = 256
+QUERY_CHUNK_ROWS = 4096  # rows read from the memmap at a time
+
+def job_text(title, required_skills, description):
+    return "\n".join(part for part in (title, required_skills, description) if part)
+
+def text_hash(text):
+    return hashlib.sha1(" ".join((text or "").split()).encode("utf-8")).hexdigest()
+
+def hashed_counts(text, dimensions):
+    # Sublinear term frequencies of the content words by bucket; crc32 is
+    # stable across processes, unlike hash()
+    words = content_words(text or "")
+    buckets = np.fromiter((zlib.crc32(word.encode("utf-8")) % dimensions for word in words), dtype=np.int64, count=len(words))
+    return np.log1p(np.bincount(buckets, minlength=dimensions)).astype(np.float32)
+
+@contextmanager
+def index_lock(index_dir, exclusive):
+    os.makedirs(index_dir, exist_ok=True)
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(index_dir, "lock"), "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+class SimilarityIndex:
+    def __init__(self, index_dir=DEFAULT_INDEX_DIR, dimensions=DEFAULT_DIMENSIONS):
+        os.makedirs(index_dir, exist_ok=True)
+        self.index_dir = index_dir
+        meta_path = os.path.join(index_dir, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                self.meta = json.load(f)
+        else:
+            self.meta = {
+                "dimensions": dimensions,
+                "kinds": {kind: {"rows": {}, "hashes": {}, "free": [], "size": 0, "capacity": 0} for kind in KINDS},
+            }
+        self.dimensions = self.meta["dimensions"]
+        self.df = {}
+        self.matrices = {}
+        for kind in KINDS:
+            df_path = self._path(f"{kind}_df.npy")
+            self.df[kind] = np.load(df_path) if os.path.exists(df_path) else np.zeros(self.dimensions, dtype=np.int64)
+            self.matrices[kind] = self._open(kind)
+
+    def _path(self, name):
+        return os.path.join(self.index_dir, name)
+
+    def _open(self, kind):
+        capacity = self.meta["kinds"][kind]["capacity"]
+        if not capacity:
+            return None
+        return np.memmap(self._path(f"{kind}.f32"), dtype=np.float32, mode="r+", shape=(capacity, self.dimensions))
+
+    def _next_row(self, kind):
+        info = self.meta["kinds"][kind]
+        if info["free"]:
+            return info["free"].pop()
+        if info["size"] == info["capacity"]:
+            # Double the file; the new rows read as zeros
+            if self.matrices[kind] is not None:
+                self.matrices[kind].flush()
+                self.matrices[kind] = None
+            info["capacity"] = max(INITIAL_ROWS, info["capacity"] * 2)
+            with open(self._path(f"{kind}.f32"), "ab") as f:
+                f.truncate(info["capacity"] * self.dimensions * 4)
+            self.matrices[kind] = self._open(kind)
+        info["size"] += 1
+        return info["size"] - 1
+
+    def upsert(self, kind, doc_id, text):
+        # Returns True if the stored vector changed
+        info = self.meta["kinds"][kind]
+        key = str(doc_id)
+        digest = text_hash(text)
+        if info["hashes"].get(key) == digest:
+            return False
+        vector = hashed_counts(text, self.dimensions)
+        row = info["rows"].get(key)
+        if row is None:
+            row = self._next_row(kind)
+            info["rows"][key] = row
+        else:
+            self.df[kind] -= self.matrices[kind][row] > 0
+        self.matrices[kind][row] = vector
+        self.df[kind] += vector > 0
+        info["hashes"][key] = digest
+        return True
+
+    def remove(self, kind, doc_id):
+        info = self.meta["kinds"][kind]
+        row = info["rows"].pop(str(doc_id), None)
+        if row is None:
+            return False
+        self.df[kind] -= self.matrices[kind][row] > 0
+        self.matrices[kind][row] = 0
+        info["hashes"].pop(str(doc_id), None)
+        info["free"].append(row)
+        return True
+
+    def save(self):
+        for kind in KINDS:
+            if self.matrices[kind] is not None:
+                self.matrices[kind].flush()
+            np.save(self._path(f"{kind}_df.npy"), self.df[kind])
+        tmp_path = self._path("meta.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp_path, self._path("meta.json"))
+
+    def idf(self):
+        # Over both kinds, so words common to every resume and job count for little
+        documents = sum(len(self.meta["kinds"][kind]["rows"]) for kind in KINDS)
+        df = self.df["candidates"] + self.df["jobs"]
+        return (np.log((1 + documents) / (1 + df)) + 1).astype(np.float32)
+
+    def vector(self, kind, doc_id):
+        row = self.meta["kinds"][kind]["rows"].get(str(doc_id))
+        return None if row is None else np.array(self.matrices[kind][row])
+
+    def top_k(self, target_kind, vector, k=10, among=None):
+        # The k rows of target_kind with the highest TF-IDF cosine similarity
+        # to vector: (x * idf) . (q * idf) / (|x * idf| |q * idf|), computed
+        # as x . (q * idf^2) and sqrt(x^2 . idf^2) a block of rows at a time
+        rows_by_id = self.meta["kinds"][target_kind]["rows"]
+        if among is not None:
+            wanted = {str(doc_id) for doc_id in among}
+            rows_by_id = {key: row for key, row in rows_by_id.items() if key in wanted}
+        idf_squared = self.idf() ** 2
+        query = vector * idf_squared
+        query_norm = float(np.sqrt(vector ** 2 @ idf_squared))
+        if not rows_by_id or query_norm == 0:
+            return []
+        ids = np.array([int(key) for key in rows_by_id])
+        rows = np.array(list(rows_by_id.values()))
+        order = np.argsort(rows)  # sequential reads from the memmap
+        ids, rows = ids[order], rows[order]
+        scores = np.zeros(len(rows))
+        matrix = self.matrices[target_kind]
+        for start in range(0, len(rows), QUERY_CHUNK_ROWS):
+            block = matrix[rows[start:start + QUERY_CHUNK_ROWS]]
+            norms = np.sqrt((block * block) @ idf_squared)
+            np.divide(block @ query, norms * query_norm, out=scores[start:start + len(block)], where=norms > 0)
+        k = max(1, min(k, len(scores)))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.lexsort((ids[top], -scores[top]))]
+        return [{"id": int(ids[i]), "score": round(float(scores[i]), 4)} for i in top]
+
+    def similar_to_text(self, target_kind, text, k=10, among=None):
+        return self.top_k(target_kind, hashed_counts(text, self.dimensions), k, among)
+
+    def similar_to_id(self, source_kind, doc_id, k=10, among=None):
+        vector = self.vector(source_kind, doc_id)
+        return [] if vector is None else self.top_k(OTHER_KIND[source_kind], vector, k, among)
+
+    def stats(self):
+        return {
+            "dimensions": self.dimensions,
+            **{kind: {"documents": len(info["rows"]), "capacity": info["capacity"]} for kind, info in self.meta["kinds"].items()},
+        }
+
+def load_documents(engine):
+    # {kind: {id: text}} for everything currently in the database
+    from sqlalchemy import text
+    documents = {kind: {} for kind in KINDS}
+    with engine.connect() as conn:
+        for doc_id, resume_text in conn.execute(text("SELECT id, resume_text FROM candidates WHERE resume_text IS NOT NULL AND resume_text <> ''")):
+            documents["candidates"][doc_id] = resume_text
+        # Deleted jobs are only marked as such; they leave the index
+        for doc_id, title, required_skills, description in conn.execute(text("SELECT id, title, required_skills, description FROM jobs WHERE status IS DISTINCT FROM 'deleted'")):
+            documents["jobs"][doc_id] = job_text(title, required_skills, description)
+    return documents
+
+def sync(index, documents):
+    # Brings the index in line with documents; only changed rows are written
+    counts = {}
+    for kind in KINDS:
+        changed = sum(index.upsert(kind, doc_id, text) for doc_id, text in documents[kind].items())
+        stale = [key for key in index.meta["kinds"][kind]["rows"] if int(key) not in documents[kind]]
+        for key in stale:
+            index.remove(kind, key)
+        counts[kind] = {"documents": len(documents[kind]), "updated": changed, "removed": len(stale)}
+    index.save()
+    return counts
+
+def handle_update(index, item):
+    if item.get("kind") not in KINDS:
+        return {"error": f"Unknown kind: {item.get('kind')}"}
+    if item.get("text"):
+        changed = index.upsert(item["kind"], item["id"], item["text"])
+    else:
+        changed = index.remove(item["kind"], item["id"])
+    return {"kind": item["kind"], "id": item["id"], "changed": changed}
+
+def handle_query(index, item):
+    k = 10 if item.get("k") is None else item["k"]
+    if isinstance(k, bool) or not isinstance(k, (int, float, str)):
+        return {"error": f"Invalid k: {k!r}"}
+    try:
+        k = int(k)
+    except ValueError:
+        return {"error": f"Invalid k: {k!r}"}
+    if k < 1:
+        return {"error": f"k must be at least 1, got {k}"}
+    if item.get("text") is not None:
+        if item.get("to") not in KINDS:
+            return {"error": f"Unknown kind: {item.get('to')}"}
+        return {"to": item["to"], "matches": index.similar_to_text(item["to"], item["text"], k, item.get("among"))}
+    if item.get("from") not in KINDS:
+        return {"error": f"Unknown kind: {item.get('from')}"}
+    return {"from": item["from"], "id": item.get("id"), "matches": index.similar_to_id(item["from"], item.get("id"), k, item.get("among"))}
+
+def meta_version(index_dir):
+    # Changes whenever any process saves the index (meta.json is replaced)
+    try:
+        stat = os.stat(os.path.join(index_dir, "meta.json"))
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+def serve(index_dir, dimensions):
+    # Requests {"id": 1, "action": "update" | "query", "items": [...]} are
+    # answered in order with {"id": 1, "results": [...]}, one result per item
+    # as the update/query commands print them, or {"id": 1, "error": "..."}.
+    # The index stays loaded between requests and is reopened only when
+    # another process (sync, the chatbot, the CLI) has saved it since.
+    handlers = {"update": handle_update, "query": handle_query}
+    index, loaded_version = None, None
+
+    def respond(response):
+        sys.stdout.write(json.dumps(response) + "\n")
+        sys.stdout.flush()
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            respond({"id": None, "error": f"Invalid request: {e}"})
+            continue
+        action = request.get("action")
+        if action not in handlers:
+            respond({"id": request.get("id"), "error": f"Unknown action: {action}"})
+            continue
+        try:
+            with index_lock(index_dir, exclusive=action == "update"):
+                if index is None or meta_version(index_dir) != loaded_version:
+                    index = SimilarityIndex(index_dir, dimensions)
+                results = []
+                for item in request.get("items") or []:
+                    try:
+                        results.append(handlers[action](index, item))
+                    except Exception as e:
+                        results.append({"error": str(e)})
+                if action == "update":
+                    index.save()
+                loaded_version = meta_version(index_dir)
+            respond({"id": request.get("id"), "results": results})
+        except Exception as e:
+            index = None  # possibly half-updated; reload from disk next time
+            respond({"id": request.get("id"), "error": str(e)})
+
+def main():
+    parser = argparse.ArgumentParser(description="Candidate/job similarity index")
+    parser.add_argument('command', choices=['sync', 'update', 'query', 'stats', 'serve'])
+    parser.add_argument('--index-dir', type=str, default=DEFAULT_INDEX_DIR, help='Directory holding the index')
+    parser.add_argument('--dimensions', type=int, default=DEFAULT_DIMENSIONS, help='Hash buckets per vector (new indexes only)')
+    args = parser.parse_args()
+
+    if args.command == "sync":
+        from backfill_resume_text import connect_db
+        engine = connect_db()
+        with index_lock(args.index_dir, exclusive=True):
+            print(json.dumps(sync(SimilarityIndex(args.index_dir, args.dimensions), load_documents(engine))))
+        return
+    if args.command == "serve":
+        serve(args.index_dir, args.dimensions)
+        return
+    if args.command == "stats":
+        with index_lock(args.index_dir, exclusive=False):
+            print(json.dumps(SimilarityIndex(args.index_dir, args.dimensions).stats()))
+        return
+
+    try:
+        items = json.load(sys.stdin)
+    except ValueError as e:
+        print(f"Error: invalid input: {e}", file=sys.stderr)
+        sys.exit(1)
+    handle = handle_update if args.command == "update" else handle_query
+    with index_lock(args.index_dir, exclusive=args.command == "update"):
+        index = SimilarityIndex(args.index_dir, args.dimensions)
+        for item in items if isinstance(items, list) else [items]:
+            try:
+                response = handle(index, item)
+            except Exception as e:
+                response = {"error": str(e)}
+            print(json.dumps(response), flush=True)
+        if args.command == "update":
+            index.save()
+
+if __name__ == "__main__":
+    main()
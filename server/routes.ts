@@ -5,14 +5,83 @@ import jwt from "jsonwebtoken";
 import bcrypt from "bcryptjs";
 import multer from "multer";
 import path from "path";
-import { insertUserSchema, insertCandidateSchema, insertEducationSchema, insertExperienceSchema, insertJobSchema, insertJobTemplateSchema, insertApplicationSchema, insertEmailTemplateSchema, insertSkillSchema, insertProjectSchema, type SearchFilters, candidates } from "@shared/schema";
+import { insertUserSchema, insertCandidateSchema, insertEducationSchema, insertExperienceSchema, insertJobSchema, insertJobTemplateSchema, insertApplicationSchema, insertEmailTemplateSchema, insertSkillSchema, insertProjectSchema, type SearchFilters, type ResumeSection, candidates } from "@shared/schema";
 import { z } from "zod";
-import { spawn } from "child_process";
 import { eq, sql, or } from "drizzle-orm";
 import { db } from "./db";
 import { applications, offers, jobCosts, users } from "@shared/schema";
 import crypto from "crypto";
 import { redisService } from "./redis";
+import { resumeExtractionWorker, aiScoringWorker, chatbotWorker, similarityIndexWorker, runJsonLines } from "./pythonWorker";
+
+// Upper bound on extraction work per uploaded resume; stays inside the
+// worker's 60s request timeout so an oversized PDF returns partial text
+// instead of an error.
+const RESUME_EXTRACTION_BUDGET = { max_pages: 20, deadline_s: 45 };
+
+type ResumeExtraction = {
+  text: string;
+  sections: ResumeSection[];
+  elapsed_ms: number;
+  truncated: Record<string, unknown> | null;
+};
+
+// Extracts the text and section offsets of an uploaded resume; both are stored
+// so AI scoring can send only the sections it needs.
+async function extractResume(resumePath: string): Promise<ResumeExtraction> {
+  const result = await resumeExtractionWorker.request<ResumeExtraction>({
+    file_path: resumePath,
+    budget: RESUME_EXTRACTION_BUDGET,
+    sections: true
+  });
+  if (result.truncated) {
+    console.warn('Resume text extraction was truncated:', result.truncated);
+  }
+  return result;
+}
+
+// One line per scored application: the score and where the time went. The
+// full input (resume text included) and AI response are no longer logged;
+// run ai_scoring.py with --verbose to see them.
+function logAiResult(label: string, applicationId: number | string, aiResult: any) {
+  if (!aiResult) {
+    console.log(`AI scoring (${label}) for application ${applicationId}: no result`);
+    return;
+  }
+  const metrics = aiResult.Metrics || {};
+  console.log(
+    `AI scoring (${label}) for application ${applicationId}: score ${aiResult.WeightedScore}, ` +
+    `by ${aiResult.ScoredBy}, cache ${metrics.cache}, ${metrics.total_ms}ms ` +
+    `(llm ${metrics.llm_ms}ms, queue ${metrics.queue_ms}ms), ` +
+    `${metrics.prompt_tokens}+${metrics.completion_tokens} tokens`
+  );
+}
+
+// Whether a stored ai_score_breakdown came from the LLM rather than the local
+// scorer. Breakdowns saved before scored_by was recorded are told apart by
+// their reasoning: local results always start with "Scored locally".
+function hasLlmScore(breakdown: any): boolean {
+  if (!breakdown) return false;
+  if (breakdown.scored_by) return breakdown.scored_by === 'llm';
+  return typeof breakdown.reasoning === 'string' && !breakdown.reasoning.startsWith('Scored locally');
+}
+
+// Keeps the local candidate/job similarity index (similarity_index.py, served
+// by the resident similarityIndexWorker) in step with resume and job changes.
+// Runs in the background; a failed update never fails the request, and
+// `similarity_index.py sync` rebuilds from the DB.
+type SimilarityIndexItem = { kind: 'candidates' | 'jobs'; id: number; text: string };
+
+function jobIndexText(job: { title?: string | null; requiredSkills?: string | null; description?: string | null }) {
+  return [job.title, job.requiredSkills, job.description].filter(Boolean).join('\n');
+}
+
+function updateSimilarityIndex(items: SimilarityIndexItem[]) {
+  if (items.length === 0) return;
+  similarityIndexWorker.request({ action: 'update', items }).catch((error) => {
+    console.error('Similarity index update failed:', error);
+  });
+}
 import { secretManager } from "./secrets";
 import { skillRequestSchema } from "@shared/schema";
 
@@ -136,11 +205,6 @@ const requireRole = (role: string) => {
 };
 
 export async function registerRoutes(app: Express): Promise<Server> {
-  // Helper function to get Python command
-  const getPythonCommand = () => {
-    return process.platform === 'win32' ? 'python' : 'python3';
-  };
-
   // Create uploads directory
   const fs = await import('fs');
   if (!fs.existsSync('uploads')) {
@@ -681,6 +745,13 @@ export async function registerRoutes(app: Express): Promise<Server> {
         ? profileData.github.trim()
         : null;
       
+      // Stored section offsets point into the old resume text; scoring
+      // re-segments the new text while they are null
+      const resumeTextChanged = profileData.resumeText !== undefined && profileData.resumeText !== candidate.resumeText;
+      if (resumeTextChanged) {
+        profileData.resumeSections = null;
+      }
+      
       console.log('🔍 [PROFILE UPDATE] Final data for database:', JSON.stringify(profileData, null, 2));
       // If CNIC is being updated, validate format and check uniqueness
       if (profileData.cnic && profileData.cnic !== candidate.cnic) {
@@ -701,6 +772,9 @@ export async function registerRoutes(app: Express): Promise<Server> {
       
       console.log('📞 [PROFILE UPDATE] Calling storage.updateCandidate with data:', JSON.stringify(profileData, null, 2));
       const updatedCandidate = await storage.updateCandidate(candidate.id, profileData);
+      if (resumeTextChanged) {
+        updateSimilarityIndex([{ kind: 'candidates', id: candidate.id, text: profileData.resumeText }]);
+      }
       
       // Handle projects if they are included in the request
       if (validatedData.projects) {
@@ -904,57 +978,21 @@ export async function registerRoutes(app: Express): Promise<Server> {
       const resumeUrl = `/uploads/${req.file.filename}`;
       const resumePath = req.file.path;
 
-      // Call Python script to extract resume text (optional)
+      // Extract resume text through the resident extraction worker (optional)
       let resumeText = '';
+      let resumeSections: ResumeSection[] = [];
       try {
-        // Check if Python is available
-        const { spawn } = await import('child_process');
-        const python = spawn(getPythonCommand(), ['--version'], { stdio: 'pipe' });
-        
-        await new Promise((resolve, reject) => {
-          python.on('close', (code) => {
-            if (code === 0) {
-              // Python is available, proceed with text extraction
-              const extractPython = spawn(getPythonCommand(), [
-                './server/resume_parser/extract_resume_text.py',
-                resumePath
-              ], {
-                env: { ...process.env, PYTHONIOENCODING: 'utf-8' }
-              });
-              
-              let output = '';
-              let errorOutput = '';
-              extractPython.stdout.on('data', (data) => {
-                output += data.toString();
-              });
-              extractPython.stderr.on('data', (data) => {
-                errorOutput += data.toString();
-              });
-              
-              extractPython.on('close', (extractCode) => {
-                if (extractCode === 0) {
-                  resumeText = output;
-                  console.log('Resume text extracted successfully');
-                } else {
-                  console.error('Resume parsing error:', errorOutput);
-                  resumeText = '';
-                }
-                resolve(null);
-              });
-            } else {
-              // Python not available, skip text extraction
-              console.log('Python not available, skipping resume text extraction');
-              resumeText = '';
-              resolve(null);
-            }
-          });
-        });
+        const result = await extractResume(resumePath);
+        resumeText = result.text;
+        resumeSections = result.sections;
+        console.log(`Resume text extracted successfully in ${result.elapsed_ms}ms`);
       } catch (err) {
-        console.error('Failed to check Python or parse resume:', err);
+        console.error('Resume parsing error:', err);
         resumeText = '';
       }
 
-      await storage.updateCandidate(candidate.id, { resumeUrl, resumeText });
+      await storage.updateCandidate(candidate.id, { resumeUrl, resumeText, resumeSections });
+      updateSimilarityIndex([{ kind: 'candidates', id: candidate.id, text: resumeText }]);
 
       res.json({ resumeUrl, resumeText });
     } catch (error) {
@@ -1041,6 +1079,7 @@ export async function registerRoutes(app: Express): Promise<Server> {
     try {
       const jobData = insertJobSchema.parse(req.body);
       const job = await storage.createJob(jobData);
+      updateSimilarityIndex([{ kind: 'jobs', id: job.id, text: jobIndexText(job) }]);
       
       // If assessmentTemplateId is provided, create the job-assessment link
       if (jobData.assessmentTemplateId) {
@@ -1082,6 +1121,9 @@ export async function registerRoutes(app: Express): Promise<Server> {
       }
       
       const job = await storage.updateJob(jobId, jobData);
+      if (job) {
+        updateSimilarityIndex([{ kind: 'jobs', id: job.id, text: jobIndexText(job) }]);
+      }
       res.json(job);
     } catch (error: unknown) {
       console.error('Job update error:', error);
@@ -1109,6 +1151,8 @@ export async function registerRoutes(app: Express): Promise<Server> {
       
       // Soft delete the job (mark as deleted)
       await storage.deleteJob(jobId);
+      // Empty text removes the job from the similarity index
+      updateSimilarityIndex([{ kind: 'jobs', id: jobId, text: '' }]);
       res.status(200).json({ message: 'Job deleted successfully' });
     } catch (error: unknown) {
       console.error('Job delete error:', error);
@@ -1372,49 +1416,35 @@ export async function registerRoutes(app: Express): Promise<Server> {
           const education_dates = (profile.education || []).map(e => [e.fromDate, e.toDate]);
           const aiInput = {
             resume: resumeText,
+            resume_sections: profile.resumeSections,
             job_description: job?.description || '',
             experience_dates,
             education_dates,
+            weights: job?.scoringWeights || undefined,
             groq_api_key: process.env.GROQ_API_KEY || undefined
           };
-          console.log('AI input:', aiInput);
-          // When spawning the Python process for AI scoring, pass the environment explicitly
-          const py = spawn(getPythonCommand(), ['server/resume_parser/ai_scoring.py'], {
-            env: { 
-              ...process.env,
-              GROQ_API_KEY: process.env.GROQ_API_KEY || ''
-            }
-          });
-          let output = '';
-          let errorOutput = '';
-          py.stdout.on('data', (data) => { output += data.toString(); });
-          py.stderr.on('data', (data) => { errorOutput += data.toString(); });
-          py.stdin.write(JSON.stringify(aiInput));
-          py.stdin.end();
-          await new Promise((resolve) => {
-            py.on('close', () => resolve(null));
-          });
-          console.log('AI script output:', output);
-          if (errorOutput) console.error('AI script error output:', errorOutput);
           let aiResult;
           try {
-            aiResult = JSON.parse(output);
+            aiResult = await aiScoringWorker.request(aiInput);
           } catch (e) {
-            console.error('Error parsing AI script output:', output, e);
+            console.error('AI scoring error:', e);
             aiResult = null;
           }
-          console.log('Parsed AI result:', aiResult);
+          logAiResult('apply', application.id, aiResult);
           if (aiResult && aiResult.WeightedScore !== undefined) {
             await storage.updateApplication(application.id, {
               ai_score: aiResult.WeightedScore,
               ai_score_breakdown: {
                 ...aiResult.Scores,
-                reasoning: aiResult.Reasoning || "No reasoning provided"
+                reasoning: aiResult.Reasoning || "No reasoning provided",
+                metrics: aiResult.Metrics,
+                inputs: aiResult.Inputs,
+                scored_by: aiResult.ScoredBy
               },
               red_flags: aiResult.RedFlag
             });
           } else {
-            console.error('AI result missing WeightedScore or is null:', aiResult);
+            console.error('AI result missing WeightedScore or is null:', aiResult?.error || aiResult);
           }
         } catch (err) {
           console.error('AI scoring error:', err);
@@ -1456,46 +1486,32 @@ export async function registerRoutes(app: Express): Promise<Server> {
       const education_dates = (profile.education || []).map(e => [e.fromDate, e.toDate]);
       const aiInput = {
         resume: resumeText,
+        resume_sections: profile.resumeSections,
         job_description: job?.description || '',
         experience_dates,
         education_dates,
-        weights,
+        weights: weights || job?.scoringWeights || undefined,
         groq_api_key: process.env.GROQ_API_KEY || undefined
       };
-      console.log('AI input (regenerate):', aiInput);
-      const { spawn } = (await import('child_process'));
-              const py = spawn(getPythonCommand(), ['./server/resume_parser/ai_scoring.py'], {
-        env: { 
-          ...process.env, 
-          PYTHONIOENCODING: 'utf-8',
-          GROQ_API_KEY: process.env.GROQ_API_KEY || ''
-        }
-      });
-      let output = '';
-      let errorOutput = '';
-      py.stdout.on('data', (data: any) => { output += data.toString(); });
-      py.stderr.on('data', (data: any) => { errorOutput += data.toString(); });
-      py.stdin.write(JSON.stringify(aiInput));
-      py.stdin.end();
-      await new Promise((resolve) => {
-        py.on('close', () => resolve(null));
-      });
-      console.log('AI script output (regenerate):', output);
-      if (errorOutput) console.error('AI script error output (regenerate):', errorOutput);
       let aiResult;
       try {
-        aiResult = JSON.parse(output);
+        aiResult = await aiScoringWorker.request(aiInput);
       } catch (e: any) {
-        console.error('Error parsing AI script output (regenerate):', output, e);
+        console.error('AI scoring error (regenerate):', e);
         aiResult = null;
       }
-      console.log('Parsed AI result (regenerate):', aiResult);
-      if (aiResult && aiResult.WeightedScore !== undefined) {
+      logAiResult('regenerate', applicationId, aiResult);
+      // A local fallback (the AI call failed) keeps an existing LLM score
+      const keepLlmScore = aiResult?.ScoredBy === 'local' && hasLlmScore(application.ai_score_breakdown);
+      if (aiResult && aiResult.WeightedScore !== undefined && !keepLlmScore) {
         await storage.updateApplication(applicationId, {
           ai_score: aiResult.WeightedScore,
           ai_score_breakdown: {
             ...aiResult.Scores,
-            reasoning: aiResult.Reasoning || "No reasoning provided"
+            reasoning: aiResult.Reasoning || "No reasoning provided",
+            metrics: aiResult.Metrics,
+            inputs: aiResult.Inputs,
+            scored_by: aiResult.ScoredBy
           },
           red_flags: aiResult.RedFlag
         });
@@ -1554,14 +1570,18 @@ export async function registerRoutes(app: Express): Promise<Server> {
     }
   });
 
-  // Batch regenerate AI scores for all applications of a job
+  // Batch regenerate AI scores for all applications of a job. With
+  // incremental: true, applications whose resume, job description, dates and
+  // weights are unchanged since their stored score are left as they are.
+  // A local score (outside the shortlist, or the fallback when the AI call
+  // failed) never replaces an application's existing LLM score; those
+  // applications are counted as "kept".
   app.post('/api/jobs/:jobId/regenerate-scores', authenticateToken, requireRole('admin'), async (req: any, res) => {
     try {
       const jobId = parseInt(req.params.jobId);
       const weights = req.body.weights;
       
-      console.log('Regenerating scores for job:', jobId);
-      console.log('Weights received:', weights);
+      console.log('Regenerating scores for job:', jobId, 'weights:', weights);
       
       if (!weights || typeof weights !== 'object') {
         return res.status(400).json({ message: 'Weights are required.' });
@@ -1571,34 +1591,25 @@ export async function registerRoutes(app: Express): Promise<Server> {
       const applications = await storage.getApplicationsByJob(jobId);
       const job = await storage.getJob(jobId);
       
-      console.log('Found applications:', applications.length);
-      console.log('Job:', job?.title);
-      console.log('Applications:', applications.map(app => ({ id: app.id, candidateId: app.candidateId, status: app.status })));
+      console.log(`Found ${applications.length} applications for job: ${job?.title}`);
       
       if (!job) {
         return res.status(404).json({ message: 'Job not found.' });
       }
+      // Later applications, single regenerates and re-weights start from these
+      await storage.updateJob(jobId, { scoringWeights: weights });
       
       let updated = [];
       let processed = 0;
       let skipped = 0;
+      let unchanged = 0;
+      let kept = 0;
+      const previousBreakdowns = new Map(applications.map((application: any) => [application.id, application.ai_score_breakdown]));
+      const incremental = req.body.incremental === true;
+      const batch: Record<string, unknown>[] = [];
       
       for (const application of applications) {
-        console.log(`\n--- Processing application ${processed + 1}/${applications.length} ---`);
-        console.log(`Application ID: ${application.id}, Candidate ID: ${application.candidateId}, Status: ${application.status}`);
-        
         const profile = await storage.getCandidateWithProfile(application.candidateId);
-        console.log(`Profile found: ${!!profile}`);
-        console.log(`Profile data:`, {
-          id: profile?.id,
-          firstName: profile?.firstName,
-          lastName: profile?.lastName,
-          hasResumeText: !!profile?.resumeText,
-          resumeTextLength: profile?.resumeText?.length || 0,
-          hasExperience: !!profile?.experience?.length,
-          hasEducation: !!profile?.education?.length,
-          resumeTextPreview: profile?.resumeText?.substring(0, 50) || 'No resume text'
-        });
         
         if (!profile) {
           console.log(`Skipping application ${application.id} - no profile found`);
@@ -1608,7 +1619,6 @@ export async function registerRoutes(app: Express): Promise<Server> {
         
         if (!profile.resumeText) {
           console.log(`Skipping application ${application.id} - no resume text`);
-          console.log(`Profile keys:`, Object.keys(profile));
           skipped++;
           continue;
         }
@@ -1616,12 +1626,9 @@ export async function registerRoutes(app: Express): Promise<Server> {
         const experience_dates = (profile.experience || []).map((e: any) => [e.fromDate, e.toDate]);
         const education_dates = (profile.education || []).map((e: any) => [e.fromDate, e.toDate]);
         
-        console.log(`Experience dates: ${experience_dates.length}`);
-        console.log(`Education dates: ${education_dates.length}`);
-        console.log(`Resume text preview: ${profile.resumeText.substring(0, 100)}...`);
-        
         const aiInput = {
           resume: profile.resumeText,
+          resume_sections: profile.resumeSections,
           job_description: job.description || '',
           experience_dates,
           education_dates,
@@ -1629,16 +1636,6 @@ export async function registerRoutes(app: Express): Promise<Server> {
           groq_api_key: process.env.GROQ_API_KEY || undefined
         };
         
-        console.log('=== AI INPUT DEBUG ===');
-        console.log('Weights:', aiInput.weights);
-        console.log('Resume text length:', aiInput.resume.length);
-        console.log('Resume text preview:', aiInput.resume.substring(0, 200) + '...');
-        console.log('Job description length:', aiInput.job_description.length);
-        console.log('Job description preview:', aiInput.job_description.substring(0, 200) + '...');
-        console.log('Experience dates count:', aiInput.experience_dates.length);
-        console.log('Education dates count:', aiInput.education_dates.length);
-        console.log('=== END AI INPUT DEBUG ===');
-        
         // Validate input data
         if (!aiInput.resume || aiInput.resume.trim().length === 0) {
           console.log(`ERROR: No resume text for application ${application.id}`);
@@ -1652,135 +1649,78 @@ export async function registerRoutes(app: Express): Promise<Server> {
           continue;
         }
         
-        const { spawn } = await import('child_process');
-        let output = '';
-        let errorOutput = '';
-        
-        console.log('Starting Python process...');
-        console.log('Input JSON size:', JSON.stringify(aiInput).length, 'characters');
-        
-        // Check if Python script exists
-        const fs = await import('fs');
-        const path = await import('path');
-        const scriptPath = path.join(process.cwd(), 'server', 'resume_parser', 'ai_scoring.py');
-        console.log('Python script path:', scriptPath);
-        console.log('Script exists:', fs.existsSync(scriptPath));
-        
-        const py = spawn(getPythonCommand(), [scriptPath], {
-          env: { 
-            ...process.env, 
-            PYTHONIOENCODING: 'utf-8',
-            GROQ_API_KEY: process.env.GROQ_API_KEY || ''
-          }
+        batch.push({
+          ...aiInput,
+          id: application.id,
+          previous_inputs: (application.ai_score_breakdown as any)?.inputs
         });
-        
-        py.stdout.on('data', (data: any) => { 
-          output += data.toString();
-          console.log('Python stdout:', data.toString());
-        });
-        
-        py.stderr.on('data', (data: any) => { 
-          errorOutput += data.toString();
-          console.log('Python stderr:', data.toString());
-        });
-        
-        py.on('error', (error: any) => {
-          console.error('Python process error:', error);
-        });
-        
-        const inputJson = JSON.stringify(aiInput);
-        console.log('Sending input to Python script...');
-        console.log('Input JSON size:', inputJson.length, 'characters');
-        console.log('Input JSON preview:', inputJson.substring(0, 500) + '...');
-        
-        py.stdin.write(inputJson);
-        py.stdin.end();
-        console.log('Input sent to Python script');
-        
-        // Add timeout and better error handling
-        try {
-          await new Promise((resolve, reject) => {
-            const timeout = setTimeout(() => {
-              console.log('Python process timed out');
-              py.kill();
-              reject(new Error('Python process timed out'));
-            }, 30000); // 30 second timeout
-            
-            py.on('close', (code) => {
-              clearTimeout(timeout);
-              console.log(`Python process exited with code ${code}`);
-              console.log(`Python stdout length: ${output.length}`);
-              console.log(`Python stderr length: ${errorOutput.length}`);
-              
-              if (code !== 0) {
-                console.log('Python stderr output:', errorOutput);
-                reject(new Error(`Python process failed with code ${code}`));
-              } else {
-                console.log('Python process completed successfully');
-                resolve(null);
-              }
-            });
-          });
-        } catch (error) {
-          console.error('Python process error:', error);
-          console.log('Skipping this application due to Python process failure');
-          skipped++;
-          continue;
+      }
+      
+      // Score everything in one rate-limited batch; results stream back as
+      // each application finishes
+      // Optional shortlist: only the top N by the local pre-scorer go to the LLM
+      const shortlist = parseInt(req.body.shortlist) || 0;
+      const batchArgs = shortlist > 0 ? ['--batch', '--shortlist', String(shortlist)] : ['--batch'];
+      // Scores only: stream each response and stop reading once the scores are in
+      if (req.body.reasoning === false) {
+        batchArgs.push('--stream', '--no-reasoning');
+      }
+      if (incremental) {
+        batchArgs.push('--incremental');
+      }
+      // Per-job cost and latency, summed from each result's metrics
+      const metrics = { prompt_tokens: 0, completion_tokens: 0, llm_ms: 0, cache_hits: 0, fallbacks: 0, scored_locally: 0 };
+      await runJsonLines('./server/resume_parser/ai_scoring.py', batchArgs, batch, async (aiResult) => {
+        processed++;
+        if (aiResult.Skipped) {
+          unchanged++;
+          return;
         }
-        
-        let aiResult;
-        try {
-          console.log('Attempting to parse AI result...');
-          console.log('Raw output length:', output.length);
-          console.log('Raw output:', output);
-          
-          if (!output || output.trim().length === 0) {
-            console.log('ERROR: No output from Python script');
-            aiResult = null;
-          } else {
-            aiResult = JSON.parse(output);
-            console.log('AI Result parsed successfully:', aiResult);
-            console.log('Weighted Score:', aiResult.WeightedScore);
-            console.log('Scores Breakdown:', aiResult.Scores);
-            console.log('Red Flags:', aiResult.RedFlag);
-          }
-        } catch (e: unknown) {
-          console.error('Failed to parse AI result:', e);
-          console.log('Raw output:', output);
-          console.log('Error output:', errorOutput);
-          aiResult = null;
+        const resultMetrics = aiResult.Metrics;
+        if (resultMetrics) {
+          metrics.prompt_tokens += resultMetrics.prompt_tokens || 0;
+          metrics.completion_tokens += resultMetrics.completion_tokens || 0;
+          metrics.llm_ms += resultMetrics.llm_ms || 0;
+          if (resultMetrics.cache === 'hit') metrics.cache_hits++;
+          if (resultMetrics.fallback) metrics.fallbacks++;
+          if (aiResult.ScoredBy === 'local') metrics.scored_locally++;
         }
-        
-        if (aiResult && aiResult.WeightedScore !== undefined) {
-          console.log(`Updating application ${application.id} with score ${aiResult.WeightedScore}`);
-          await storage.updateApplication(application.id, {
-            ai_score: aiResult.WeightedScore,
-            ai_score_breakdown: {
-              ...aiResult.Scores,
-              reasoning: aiResult.Reasoning || "No reasoning provided"
-            },
-            red_flags: aiResult.RedFlag
-          });
-          updated.push({ 
-            applicationId: application.id, 
-            ai_score: aiResult.WeightedScore, 
-            red_flags: aiResult.RedFlag 
-          });
-          console.log(`Successfully updated application ${application.id} with score ${aiResult.WeightedScore}`);
-        } else {
-          console.log(`No valid AI result for application ${application.id}`);
-          console.log('AI Result was:', aiResult);
+        if (aiResult.error || aiResult.WeightedScore === undefined) {
+          console.log(`No valid AI result for application ${aiResult.id}:`, aiResult.error || aiResult);
+          skipped++;
+          return;
         }
-        
-        processed++;
-      }
+        if (aiResult.ScoredBy === 'local' && hasLlmScore(previousBreakdowns.get(aiResult.id))) {
+          kept++;
+          return;
+        }
+        await storage.updateApplication(aiResult.id, {
+          ai_score: aiResult.WeightedScore,
+          ai_score_breakdown: {
+            ...aiResult.Scores,
+            reasoning: aiResult.Reasoning || "No reasoning provided",
+            metrics: aiResult.Metrics,
+            inputs: aiResult.Inputs,
+            scored_by: aiResult.ScoredBy
+          },
+          red_flags: aiResult.RedFlag
+        });
+        updated.push({ 
+          applicationId: aiResult.id, 
+          ai_score: aiResult.WeightedScore, 
+          red_flags: aiResult.RedFlag 
+        });
+        logAiResult('batch', aiResult.id, aiResult);
+      });
       
       console.log(`\n=== PROCESSING SUMMARY ===`);
       console.log(`Total applications: ${applications.length}`);
       console.log(`Processed: ${processed}`);
       console.log(`Skipped: ${skipped}`);
+      console.log(`Unchanged: ${unchanged}`);
+      console.log(`Kept LLM scores over local ones: ${kept}`);
       console.log(`Successfully updated: ${updated.length}`);
-      console.log(`Updated applications:`, updated.map(u => ({ id: u.applicationId, score: u.ai_score })));
+      console.log(`Metrics:`, metrics);
       
       res.json({ 
         updated,
@@ -1788,7 +1728,10 @@ export async function registerRoutes(app: Express): Promise<Server> {
           total: applications.length,
           processed,
           skipped,
-          updated: updated.length
+          unchanged,
+          kept,
+          updated: updated.length,
+          metrics
         }
       });
     } catch (error: unknown) {
@@ -1797,6 +1740,93 @@ export async function registerRoutes(app: Express): Promise<Server> {
     }
   });
 
+  // Re-weight stored sub-scores for all applications of a job without
+  // re-running the AI; only applications whose score changed are written
+  app.post('/api/jobs/:jobId/reweight-scores', authenticateToken, requireRole('admin'), async (req: any, res) => {
+    try {
+      const jobId = parseInt(req.params.jobId);
+      const weights = req.body.weights;
+      if (!weights || typeof weights !== 'object') {
+        return res.status(400).json({ message: 'Weights are required.' });
+      }
+      const job = await storage.getJob(jobId);
+      if (!job) {
+        return res.status(404).json({ message: 'Job not found.' });
+      }
+      const applications = await storage.getApplicationsByJob(jobId);
+      const scored = applications.filter((application: any) => application.ai_score_breakdown);
+      const response = await aiScoringWorker.request({
+        action: 'reweight',
+        weights,
+        applications: scored.map((application: any) => ({
+          id: application.id,
+          Scores: application.ai_score_breakdown,
+          Inputs: application.ai_score_breakdown.inputs
+        }))
+      });
+      // New applications and rescoring runs use the weights the scores now reflect
+      await storage.updateJob(jobId, { scoringWeights: weights });
+      const previous = new Map(scored.map((application: any) => [application.id, application]));
+      const ranking = response.results.filter((result: any) => result.WeightedScore !== null);
+      let updated = 0;
+      for (const result of ranking) {
+        const application: any = previous.get(result.id);
+        const breakdown = application.ai_score_breakdown;
+        // The stored input fingerprint follows the weights, so an incremental
+        // regenerate-scores run doesn't rescore re-weighted applications
+        const inputsChanged = result.Inputs && JSON.stringify(result.Inputs) !== JSON.stringify(breakdown.inputs);
+        if (application.ai_score !== result.WeightedScore || inputsChanged) {
+          await storage.updateApplication(result.id, {
+            ai_score: result.WeightedScore,
+            ...(inputsChanged ? { ai_score_breakdown: { ...breakdown, inputs: result.Inputs } } : {})
+          });
+          updated++;
+        }
+      }
+      ranking.sort((a: any, b: any) => a.Rank - b.Rank);
+      res.json({
+        ranking: ranking.map(({ Inputs, ...result }: any) => result),
+        summary: {
+          total: applications.length,
+          reweighted: ranking.length,
+          skipped: applications.length - ranking.length,
+          updated
+        }
+      });
+    } catch (error: unknown) {
+      console.error('Error in reweight-scores:', error);
+      res.status(500).json({ message: 'Failed to re-weight AI scores', details: error instanceof Error ? error.message : 'Unknown error' });
+    }
+  });
+
+  // Candidates whose resumes are closest to a job, from the local similarity
+  // index (no AI call). applicantsOnly=true ranks only this job's applicants.
+  app.get('/api/jobs/:jobId/similar-candidates', authenticateToken, requireRole('admin'), async (req: any, res) => {
+    try {
+      const jobId = parseInt(req.params.jobId);
+      const job = await storage.getJob(jobId);
+      if (!job) {
+        return res.status(404).json({ message: 'Job not found' });
+      }
+      const k = Math.min(Math.max(parseInt(req.query.k) || 20, 1), 200);
+      // Query by the job's current text, so edits not yet in the index still count
+      const query: Record<string, unknown> = { to: 'candidates', text: jobIndexText(job), k };
+      if (req.query.applicantsOnly === 'true') {
+        const applications = await storage.getApplicationsByJob(jobId);
+        query.among = applications.map((application: any) => application.candidateId);
+      }
+      const response = await similarityIndexWorker.request({ action: 'query', items: [query] });
+      const result = response.results[0];
+      if (result.error) {
+        throw new Error(result.error);
+      }
+      res.json({ jobId, matches: result.matches });
+    } catch (error: unknown) {
+      console.error('Error in similar-candidates:', error);
+      res.status(500).json({ message: 'Failed to rank similar candidates', details: error instanceof Error ? error.message : 'Unknown error' });
+    }
+  });
+
   // Chatbot API endpoint
   app.post('/api/chat', authenticateToken, async (req: any, res) => {
     try {
@@ -1807,73 +1837,21 @@ export async function registerRoutes(app: Express): Promise<Server> {
         return res.status(400).json({ message: 'Message is required' });
       }
       
-      // Call Python chatbot
-      const { spawn } = await import('child_process');
-      const pythonProcess = spawn('python', [
-        'Chatbot/groq_db_v2.py',
-        '--message', message,
-        '--user-id', user.id.toString(),
-        '--user-role', user.role,
-        '--history', JSON.stringify(conversation_history)
-      ], {
-        env: { ...process.env, PYTHONIOENCODING: 'utf-8' }
-      });
-      
-      let result = '';
-      let error = '';
-      
-      pythonProcess.stdout?.on('data', (data: Buffer) => {
-        result += data.toString();
-      });
-      
-      pythonProcess.stderr?.on('data', (data: Buffer) => {
-        error += data.toString();
-      });
-      
-      const timeoutId = setTimeout(() => {
-        pythonProcess.kill();
-        res.status(408).json({ message: 'Chatbot request timed out' });
+      // Answered by the resident chatbot process, which keeps its imports, DB
+      // pool and Groq clients warm between messages and sessions
+      const response = await chatbotWorker.request({
+        message,
+        user_id: user.id,
+        user_role: user.role,
+        conversation_history
       }, 120000); // 2 minutes timeout
-      
-      pythonProcess.on('close', (code: number | null) => {
-        clearTimeout(timeoutId);
-        if (code !== 0) {
-          console.error('Python chatbot error:', error);
-          return res.status(500).json({ 
-            message: 'Chatbot service error',
-            error: error || 'Unknown error'
-          });
-        }
-        
-        try {
-          result = result.trim();
-          if (!result) {
-            return res.status(500).json({ message: 'Chatbot returned empty response' });
-          }
-          
-          const parsedResult = JSON.parse(result);
-          res.json(parsedResult);
-        } catch (parseError: any) {
-          console.error('Failed to parse chatbot response:', parseError);
-          res.status(500).json({ 
-            message: 'Failed to parse chatbot response',
-            error: parseError.message
-          });
-        }
-      });
-      
-      pythonProcess.on('error', (err: Error) => {
-        clearTimeout(timeoutId);
-        console.error('Failed to start Python chatbot:', err);
-        res.status(500).json({ 
-          message: 'Failed to start chatbot service',
-          error: err.message
-        });
-      });
-      
+      res.json(response.result);
     } catch (error: any) {
       console.error('Chatbot API error:', error);
-      res.status(500).json({ message: 'Chatbot service error' });
+      if (error instanceof Error && error.message.endsWith('timed out')) {
+        return res.status(408).json({ message: 'Chatbot request timed out' });
+      }
+      res.status(500).json({ message: 'Chatbot service error', error: error?.message || 'Unknown error' });
     }
   });
 
@@ -1919,77 +1897,21 @@ export async function registerRoutes(app: Express): Promise<Server> {
         }
       };
       
-      const { spawn } = await import('child_process');
-      const fs = await import('fs');
-      const path = await import('path');
-      
-      let output = '';
-      let errorOutput = '';
-      
-      const scriptPath = path.join(process.cwd(), 'server', 'resume_parser', 'ai_scoring.py');
-      console.log('Test Python script path:', scriptPath);
-      console.log('Test Script exists:', fs.existsSync(scriptPath));
-      
-              const py = spawn(getPythonCommand(), [scriptPath], {
-        env: { 
-          ...process.env, 
-          PYTHONIOENCODING: 'utf-8',
-          GROQ_API_KEY: process.env.GROQ_API_KEY || ''
-        }
-      });
-      
-      py.stdout.on('data', (data: any) => { 
-        output += data.toString();
-        console.log('Test Python stdout:', data.toString());
-      });
-      
-      py.stderr.on('data', (data: any) => { 
-        errorOutput += data.toString();
-        console.log('Test Python stderr:', data.toString());
-      });
-      
-      py.on('error', (error: any) => {
-        console.error('Test Python process error:', error);
-      });
-      
-      const inputJson = JSON.stringify(aiInput);
-      console.log('Test Input JSON size:', inputJson.length, 'characters');
-      py.stdin.write(inputJson);
-      py.stdin.end();
-      
-      await new Promise((resolve, reject) => {
-        const timeout = setTimeout(() => {
-          console.log('Test Python process timed out');
-          py.kill();
-          reject(new Error('Test Python process timed out'));
-        }, 30000);
-        
-        py.on('close', (code) => {
-          clearTimeout(timeout);
-          console.log(`Test Python process exited with code ${code}`);
-          if (code !== 0) {
-            console.log('Test Python stderr output:', errorOutput);
-            reject(new Error(`Test Python process failed with code ${code}`));
-          } else {
-            resolve(null);
-          }
-        });
-      });
-      
       let aiResult;
+      let errorOutput = '';
       try {
-        aiResult = JSON.parse(output);
-        console.log('Test AI Result:', aiResult);
+        aiResult = await aiScoringWorker.request(aiInput, 30000);
+        logAiResult('test', 'test', aiResult);
       } catch (e: unknown) {
-        console.error('Failed to parse test AI result:', e);
-        console.log('Test Raw output:', output);
+        console.error('Test AI scoring error:', e);
+        errorOutput = e instanceof Error ? e.message : String(e);
         aiResult = null;
       }
       
       res.json({ 
         success: true, 
         result: aiResult, 
-        output, 
+        output: aiResult ? JSON.stringify(aiResult) : '', 
         errorOutput 
       });
     } catch (error: unknown) {
@@ -3905,58 +3827,22 @@ export async function registerRoutes(app: Express): Promise<Server> {
 
       const resumePath = `./uploads/${candidate.resumeUrl.split('/').pop()}`;
       
-      // Call Python script to extract resume text (optional)
+      // Extract resume text through the resident extraction worker (optional)
       let resumeText = '';
+      let resumeSections: ResumeSection[] = [];
       try {
-        // Check if Python is available
-        const { spawn } = await import('child_process');
-        const python = spawn(getPythonCommand(), ['--version'], { stdio: 'pipe' });
-        
-        await new Promise((resolve) => {
-          python.on('close', (code) => {
-            if (code === 0) {
-              // Python is available, proceed with text extraction
-              const extractPython = spawn(getPythonCommand(), [
-                './server/resume_parser/extract_resume_text.py',
-                resumePath
-              ], {
-                env: { ...process.env, PYTHONIOENCODING: 'utf-8' }
-              });
-              
-              let output = '';
-              let errorOutput = '';
-              extractPython.stdout.on('data', (data) => {
-                output += data.toString();
-              });
-              extractPython.stderr.on('data', (data) => {
-                errorOutput += data.toString();
-              });
-              
-              extractPython.on('close', (extractCode) => {
-                if (extractCode === 0) {
-                  resumeText = output;
-                  console.log('Resume text extracted successfully');
-                } else {
-                  console.error('Resume parsing error:', errorOutput);
-                  resumeText = '';
-                }
-                resolve(null);
-              });
-            } else {
-              // Python not available, return error
-              console.log('Python not available for resume text extraction');
-              resumeText = '';
-              resolve(null);
-            }
-          });
-        });
+        const result = await extractResume(resumePath);
+        resumeText = result.text;
+        resumeSections = result.sections;
+        console.log(`Resume text extracted successfully in ${result.elapsed_ms}ms`);
       } catch (err) {
-        console.error('Failed to check Python or parse resume:', err);
+        console.error('Resume parsing error:', err);
         resumeText = '';
       }
 
       if (resumeText) {
-        await storage.updateCandidate(candidate.id, { resumeText });
+        await storage.updateCandidate(candidate.id, { resumeText, resumeSections });
+        updateSimilarityIndex([{ kind: 'candidates', id: candidate.id, text: resumeText }]);
         res.json({ resumeText, message: 'Resume text extracted successfully' });
       } else {
         res.status(400).json({ message: 'Failed to extract resume text' });
@@ -3989,6 +3875,7 @@ export async function registerRoutes(app: Express): Promise<Server> {
       let processed = 0;
       let extracted = 0;
       let failed = 0;
+      const indexItems: SimilarityIndexItem[] = [];
       
       for (const application of applications) {
         const profile = await storage.getCandidateWithProfile(application.candidateId);
@@ -4010,62 +3897,13 @@ export async function registerRoutes(app: Express): Promise<Server> {
         console.log(`Extracting resume text for candidate ${application.candidateId} from URL: ${profile.resumeUrl}`);
         
         try {
-          // Check if Python is available first
-          const { spawn } = await import('child_process');
-          const pythonCheck = spawn(getPythonCommand(), ['--version'], { stdio: 'pipe' });
-          
-          await new Promise((resolve, reject) => {
-            pythonCheck.on('close', (code) => {
-              if (code === 0) {
-                // Python is available, proceed with extraction
-                const py = spawn(getPythonCommand(), ['server/resume_parser/extract_resume_text.py'], {
-                  env: { ...process.env }
-                });
-                
-                let output = '';
-                let errorOutput = '';
-                
-                py.stdout.on('data', (data: any) => { output += data.toString(); });
-                py.stderr.on('data', (data: any) => { errorOutput += data.toString(); });
-                
-                const input = {
-                  resume_url: profile.resumeUrl
-                };
-                
-                py.stdin.write(JSON.stringify(input));
-                py.stdin.end();
-                
-                const timeout = setTimeout(() => {
-                  py.kill();
-                  reject(new Error('Resume extraction timed out'));
-                }, 30000);
-                
-                py.on('close', (code) => {
-                  clearTimeout(timeout);
-                  if (code !== 0) {
-                    reject(new Error(`Resume extraction failed with code ${code}`));
-                  } else {
-                    resolve(null);
-                  }
-                });
-              } else {
-                // Python not available, skip extraction
-                console.log(`Python not available, skipping resume text extraction for candidate ${profile.id}`);
-                resolve(null);
-              }
-            });
-          });
-          
-          let resumeText = '';
-          try {
-            const result = JSON.parse(output);
-            resumeText = result.resume_text || '';
-          } catch (e) {
-            resumeText = output.trim();
-          }
+          const resumePath = `./uploads/${profile.resumeUrl.split('/').pop()}`;
+          const result = await extractResume(resumePath);
           
-          if (resumeText && resumeText.length > 0) {
-            await storage.updateCandidate(profile.id, { resumeText });
+          if (result.text.trim().length > 0) {
+            // Stored untrimmed so the section offsets stay valid
+            await storage.updateCandidate(profile.id, { resumeText: result.text, resumeSections: result.sections });
+            indexItems.push({ kind: 'candidates', id: profile.id, text: result.text });
             extracted++;
           } else {
             failed++;
@@ -4078,6 +3916,7 @@ export async function registerRoutes(app: Express): Promise<Server> {
         
         processed++;
       }
+      updateSimilarityIndex(indexItems);
       
       res.json({
         summary: {
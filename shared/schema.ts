@@ -28,6 +28,7 @@ export const candidates = pgTable("candidates", {
   resumeUrl: text("resume_url"),
   motivationLetter: text("motivation_letter"),
   resumeText: text("resume_text"), // Extracted resume text
+  resumeSections: json("resume_sections"), // Section offsets into resume_text (see resume_sections.py)
   linkedin: text("linkedin"),
   github: text("github"),
   createdAt: timestamp("created_at").defaultNow(),
@@ -82,6 +83,7 @@ export const jobs = pgTable("jobs", {
   status: text("status").notNull().default("active"), // "active", "closed"
   createdAt: timestamp("created_at").defaultNow(),
   assessmentTemplateId: integer("assessment_template_id").references(() => assessmentTemplates.id),
+  scoringWeights: json("scoring_weights"), // AI score weights last used to score or re-weight this job's applications
 });
 
 export const applications = pgTable("applications", {
@@ -356,7 +358,17 @@ export const insertUserSchema = createInsertSchema(users).omit({
   createdAt: true,
 });
 
-export const insertCandidateSchema = z.object({
+export const resumeSectionSchema = z.object({
+  name: z.string(),
+  heading: z.string().nullable(),
+  start: z.number().int(),
+  end: z.number().int(),
+});
+
+// Every candidate field the server writes. resumeSections are offsets into
+// resumeText computed at extraction, so clients can't send them (see
+// insertCandidateSchema); null means "not computed for the current text".
+const candidateFieldsSchema = z.object({
   userId: z.number().optional(),
   cnic: z.string().length(13, 'CNIC must be exactly 13 digits').regex(/^\d{13}$/, 'CNIC must be 13 digits'),
   profilePicture: z.string().optional(),
@@ -372,6 +384,7 @@ export const insertCandidateSchema = z.object({
   resumeUrl: z.string().optional(),
   motivationLetter: z.string().optional(),
   resumeText: z.string().optional(),
+  resumeSections: z.array(resumeSectionSchema).nullable().optional(),
   linkedin: z.string().optional(),
   github: z.string().optional(),
   projects: z.array(z.object({
@@ -383,6 +396,8 @@ export const insertCandidateSchema = z.object({
   })).optional(),
 });
 
+export const insertCandidateSchema = candidateFieldsSchema.omit({ resumeSections: true });
+
 export const insertEducationSchema = createInsertSchema(education).omit({
   id: true,
 });
@@ -449,7 +464,8 @@ export const insertSearchQuerySchema = createInsertSchema(searchQueries).omit({
 export type User = typeof users.$inferSelect;
 export type InsertUser = z.infer<typeof insertUserSchema>;
 export type Candidate = typeof candidates.$inferSelect;
-export type InsertCandidate = z.infer<typeof insertCandidateSchema>;
+export type InsertCandidate = z.infer<typeof candidateFieldsSchema>;
+export type ResumeSection = z.infer<typeof resumeSectionSchema>;
 export type Education = typeof education.$inferSelect;
 export type InsertEducation = z.infer<typeof insertEducationSchema>;
 export type Experience = typeof experience.$inferSelect;